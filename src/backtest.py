@@ -6,16 +6,30 @@ price data and signals, and uses the `vectorbt` library to simulate
 trade execution and portfolio performance.
 """
 
+from itertools import product
+
 import pandas as pd
 import numpy as np
 import vectorbt as vbt
+from numba import njit, prange
 from rich.console import Console
+from vectorbt.portfolio.enums import TradeStatus
 
-from src.config import Config, DetectorConfig
-from src.detectors import generate_signals
+from src.config import Config, DetectorConfig, ExecutionConfig
+from src.detectors import rolling_zscores, zscore_signal_rows
 
 __all__ = ["run"]
 
+# Portfolio columns carry the detector parameters each symbol was traded with.
+_PARAM_LEVELS = ["window", "k_low", "symbol"]
+
+# vectorbt annualises returns from the bar frequency.
+_BAR_FREQ = {"1d": "1D", "1wk": "7D", "1mo": "30D"}
+
+# Upper edges (exclusive) of the |gap| buckets for SlippageConfig.gap_2pct
+# and gap_5pct; larger gaps use gap_high.
+_SLIPPAGE_EDGES = np.array([0.02, 0.05])
+
 
 def _prepare_vbt_data(
     processed_data: dict[str, pd.DataFrame]
@@ -26,19 +40,301 @@ def _prepare_vbt_data(
     """
     # Use 'Open' for entries and 'Close' for exits as a simplification.
     # The design specifies next-day open, which vbt handles via `entry_prices`
-    open_prices = pd.concat(
-        [df["Open"] for df in processed_data.values()],
-        axis=1,
-        keys=processed_data.keys(),
-    )
-    close_prices = pd.concat(
-        [df["Close"] for df in processed_data.values()],
+    frames = list(processed_data.values())
+    dates = frames[0].index if frames else None
+    if frames and all(df.index.equals(dates) for df in frames[1:]):
+        # Symbols usually share one trading calendar: stacking the columns
+        # is a plain copy, with no index alignment, and keeps the snapshot
+        # dtype.
+        symbols = pd.Index(list(processed_data))
+        open_prices = pd.DataFrame(
+            np.column_stack([df["Open"].to_numpy() for df in frames]), index=dates, columns=symbols
+        )
+        close_prices = pd.DataFrame(
+            np.column_stack([df["Close"].to_numpy() for df in frames]), index=dates, columns=symbols
+        )
+        return open_prices, close_prices
+
+    # A single concat aligns the date index once for both price fields;
+    # columns are (symbol, field).
+    combined = pd.concat(
+        {symbol: df[["Open", "Close"]] for symbol, df in processed_data.items()},
         axis=1,
-        keys=processed_data.keys(),
     )
+    open_prices = combined.xs("Open", axis=1, level=1)
+    close_prices = combined.xs("Close", axis=1, level=1)
     return open_prices, close_prices
 
 
+def _build_entries(
+    processed_data: dict[str, pd.DataFrame],
+    dates: pd.DatetimeIndex,
+    columns: pd.MultiIndex,
+) -> pd.DataFrame:
+    """
+    Builds the next-day entry matrix for every (window, k_low, symbol) column.
+
+    Z-scores depend only on (window, symbol), so one kernel call computes
+    each such series once, on the symbol's own gaps, top-aligned, so rolling
+    windows count that symbol's bars rather than the shared calendar. Every
+    k_low column then takes its signal rows from the series' sort order,
+    and the signals are scattered onto the shared price index, where dates
+    a symbol did not trade stay False.
+    """
+    windows, k_lows, symbols = (columns.get_level_values(level) for level in _PARAM_LEVELS)
+    # Grid columns repeat symbols; slice each symbol's frame once.
+    frames = {
+        symbol: processed_data[symbol].loc[dates[0]:dates[-1]] for symbol in symbols.unique()
+    }
+    series = pd.MultiIndex.from_arrays([windows, symbols]).unique()
+    # Gaps from float32 snapshot prices are float32; keeping the matrix at
+    # that width halves the bytes the kernel streams, without losing any
+    # precision the gaps had.
+    dtype = np.result_type(*(df["gap_pct"].dtype for df in frames.values()))
+    gaps = np.full((max(len(df) for df in frames.values()), len(series)), np.nan, dtype=dtype)
+    for i, (_, symbol) in enumerate(series):
+        gaps[: len(frames[symbol]), i] = frames[symbol]["gap_pct"].to_numpy()
+    z_scores = rolling_zscores(gaps, series.get_level_values(0).to_numpy())
+    series_of_column = series.get_indexer(pd.MultiIndex.from_arrays([windows, symbols]))
+    signal_rows = zscore_signal_rows(z_scores, series_of_column, k_lows.to_numpy())
+
+    # To simulate next-day entry, each signal is written one bar later on
+    # the shared index, straight into the preallocated matrix; a signal on
+    # the last bar has no entry. No shifted copy of the frame is made.
+    # Signals are sparse, so only their rows are scattered, and each
+    # symbol's rows on the shared index are looked up once for all grid
+    # columns. Padding rows past a symbol's bars are NaN and never signal.
+    next_rows = {symbol: dates.get_indexer(df.index) + 1 for symbol, df in frames.items()}
+    entries = np.zeros((len(dates), len(columns)), dtype=bool)
+    for j, symbol in enumerate(symbols):
+        rows = next_rows[symbol][signal_rows[j]]
+        entries[rows[rows < len(dates)], j] = True
+    return pd.DataFrame(entries, index=dates, columns=columns)
+
+
+@njit(parallel=True, cache=True)
+def _execution_kernel(
+    open_prices: np.ndarray,
+    close_prices: np.ndarray,
+    guard_pct: float,
+    edges: np.ndarray,
+    fractions: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Computes each bar's gap against the symbol's last traded close, and from
+    it, in the same pass, whether a next-open fill passes the circuit guard
+    and the slippage fraction of its |gap| bucket.
+    """
+    n_rows, n_cols = close_prices.shape
+    fillable = np.zeros((n_rows, n_cols), dtype=np.bool_)
+    slippage = np.empty((n_rows, n_cols), dtype=np.float64)
+    for j in prange(n_cols):
+        prev_close = np.nan
+        for t in range(n_rows):
+            # NaN (no previous close, or no bar today) fails every
+            # comparison: never fillable, and charged the top bucket.
+            abs_gap = abs(open_prices[t, j] / prev_close - 1.0)
+            fillable[t, j] = abs_gap <= guard_pct
+            if abs_gap < edges[0]:
+                slippage[t, j] = fractions[0]
+            elif abs_gap < edges[1]:
+                slippage[t, j] = fractions[1]
+            else:
+                slippage[t, j] = fractions[2]
+            if not np.isnan(close_prices[t, j]):
+                prev_close = close_prices[t, j]
+    return fillable, slippage
+
+
+def _execution_costs(
+    open_prices: pd.DataFrame, close_prices: pd.DataFrame, execution_cfg: ExecutionConfig
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Returns, per bar and symbol, whether a next-open fill is allowed (the
+    open lies within +/- circuit_guard_pct of the previous close) and the
+    slippage charged, as a fraction of price, from the |gap| bucket.
+    """
+    slippage_cfg = execution_cfg.slippage_model
+    bps = np.array([slippage_cfg.gap_2pct, slippage_cfg.gap_5pct, slippage_cfg.gap_high])
+    fillable, slippage = _execution_kernel(
+        open_prices.to_numpy(dtype=np.float64),
+        close_prices.to_numpy(dtype=np.float64),
+        execution_cfg.circuit_guard_pct,
+        _SLIPPAGE_EDGES,
+        bps / 10000.0,
+    )
+    return (
+        pd.DataFrame(fillable, index=close_prices.index, columns=close_prices.columns),
+        pd.DataFrame(slippage, index=close_prices.index, columns=close_prices.columns),
+    )
+
+
+def _apply_circuit_guard(
+    entries: pd.DataFrame, fillable: pd.DataFrame
+) -> tuple[pd.DataFrame, int]:
+    """
+    Drops entries on bars that fail the circuit guard; returns them with the
+    count dropped. `fillable` must share the entries' date index.
+    """
+    symbols = entries.columns.get_level_values("symbol")
+    allowed = fillable[symbols].to_numpy()
+    signals = entries.to_numpy()
+    unfilled = int(np.count_nonzero(signals & ~allowed))
+    return pd.DataFrame(signals & allowed, index=entries.index, columns=entries.columns), unfilled
+
+
+@njit(parallel=True, cache=True)
+def _hold_exits_kernel(
+    entries: np.ndarray, tradable: np.ndarray, max_hold: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Walks each column once, placing an exit max_hold tradable bars after
+    every entry taken while flat. Entries during a holding period are
+    dropped, so vectorbt sees exactly the simulated trades. Bars on which a
+    symbol did not trade neither fill nor count towards the hold.
+    """
+    n_rows, n_cols = entries.shape
+    filled = np.zeros((n_rows, n_cols), dtype=np.bool_)
+    exits = np.zeros((n_rows, n_cols), dtype=np.bool_)
+    for j in prange(n_cols):
+        held = -1  # Bars held so far; -1 while flat.
+        for t in range(n_rows):
+            if not tradable[t, j]:
+                continue
+            if held >= 0:
+                held += 1
+                if held == max_hold:
+                    exits[t, j] = True
+                    held = -1
+            elif entries[t, j]:
+                filled[t, j] = True
+                held = 0
+    return filled, exits
+
+
+def _simulate(
+    close_prices: pd.DataFrame,
+    slippage: pd.DataFrame,
+    entries: pd.DataFrame,
+    config: Config,
+) -> vbt.Portfolio:
+    """
+    Runs vectorbt on the entry matrix, broadcasting each symbol's prices and
+    slippage to its columns. All frames must share the entries' date index.
+    Gap slippage is an entry cost: exits fill at the close, so they pay fees
+    only.
+    """
+    symbols = entries.columns.get_level_values("symbol")
+    close = pd.DataFrame(
+        close_prices[symbols].to_numpy(), index=entries.index, columns=entries.columns
+    )
+    filled, exits = _hold_exits_kernel(
+        entries.to_numpy(), np.isfinite(close.to_numpy()), config.detector.max_hold
+    )
+    return vbt.Portfolio.from_signals(
+        close=close,  # Use close price for transactions and valuation
+        entries=pd.DataFrame(filled, index=entries.index, columns=entries.columns),
+        exits=pd.DataFrame(exits, index=entries.index, columns=entries.columns),  # Fixed exit after max_hold bars
+        freq=_BAR_FREQ[config.data.interval],
+        fees=config.execution.fees_bps / 10000.0,
+        # An exit never shares a bar with a fill, so zeroing every other bar
+        # leaves exits free of the exit bar's opening-gap bucket.
+        slippage=np.where(filled, slippage[symbols].to_numpy(), 0.0),
+        init_cash=1e9,
+        # Every order is a kept entry or its exit, so the record array can
+        # be sized exactly instead of one slot per (bar, column).
+        max_orders=max(int(np.count_nonzero(filled) + np.count_nonzero(exits)), 1),
+    )
+
+
+def _t0_row(index: pd.DatetimeIndex, config: Config) -> int:
+    """
+    Returns the position of the first bar on or after run.t0. The date index
+    is sorted, so bars before it are a leading row slice.
+    """
+    return int(index.searchsorted(pd.Timestamp(config.run.t0).tz_localize(index.tz)))
+
+
+def _trade_scores(cols: np.ndarray, returns: np.ndarray, n_cols: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the median trade return and hit rate of each column, NaN for
+    columns without trades.
+
+    One sort by (column, return) gives every column's median from the
+    middle of its run, and bincount gives the counts, so there is no
+    per-column grouping.
+    """
+    counts = np.bincount(cols, minlength=n_cols)
+    hits = np.bincount(cols, weights=returns > 0, minlength=n_cols)
+    sorted_returns = returns[np.lexsort((returns, cols))]
+    starts = np.cumsum(counts) - counts
+
+    medians = np.full(n_cols, np.nan)
+    hit_rates = np.full(n_cols, np.nan)
+    traded = counts > 0
+    lo = starts[traded] + (counts[traded] - 1) // 2
+    hi = starts[traded] + counts[traded] // 2
+    medians[traded] = (sorted_returns[lo] + sorted_returns[hi]) / 2
+    hit_rates[traded] = hits[traded] / counts[traded]
+    return medians, hit_rates
+
+
+def _fit_params(
+    config: Config,
+    processed_data: dict[str, pd.DataFrame],
+    close_prices: pd.DataFrame,
+    fillable: pd.DataFrame,
+    slippage: pd.DataFrame,
+    console: Console,
+) -> pd.MultiIndex:
+    """
+    Picks (window, k_low) per symbol from the detector grid on in-sample data.
+
+    The whole grid is simulated in one vectorbt call on the bars before t0.
+    The objective is the median trade return, among parameter sets whose hit
+    rate meets `min_hit_rate`. Symbols with no eligible set fall back to the
+    first grid point.
+    """
+    detector_cfg = config.detector
+    symbols = list(processed_data)
+    grid = list(product(detector_cfg.window_range, detector_cfg.k_low_range))
+    chosen = {symbol: grid[0] for symbol in symbols}
+
+    # The in-sample period is a leading row slice: the sweep reuses views of
+    # the prepared matrices, not copies.
+    n_in_sample = _t0_row(close_prices.index, config)
+    if len(grid) > 1 and n_in_sample > 0:
+        console.print(f"Fitting {len(grid)} detector parameter sets on {n_in_sample} in-sample bars...")
+        in_sample = close_prices.iloc[:n_in_sample]
+        sweep_columns = pd.MultiIndex.from_tuples(
+            [(window, k_low, symbol) for window, k_low in grid for symbol in symbols],
+            names=_PARAM_LEVELS,
+        )
+        entries = _build_entries(processed_data, in_sample.index, sweep_columns)
+        entries, _ = _apply_circuit_guard(entries, fillable.iloc[:n_in_sample])
+        trades = _simulate(in_sample, slippage.iloc[:n_in_sample], entries, config).trades.records_arr
+
+        # A trade still open at t0 is marked to the last in-sample close: its
+        # return is cut short, and NaN if the symbol has no bar on that date.
+        # Only closed trades are scored.
+        trades = trades[trades["status"] == TradeStatus.Closed]
+        medians, hit_rates = _trade_scores(trades["col"], trades["return"], len(sweep_columns))
+        # Columns without trades have a NaN hit rate and are never eligible;
+        # a NaN median would make idxmax fail for the symbol.
+        is_eligible = (hit_rates >= detector_cfg.min_hit_rate) & np.isfinite(medians)
+        eligible = pd.Series(medians[is_eligible], index=sweep_columns[is_eligible])
+        # idxmax keeps the first of tied parameter sets, i.e. grid order.
+        for window, k_low, symbol in eligible.groupby(level="symbol", sort=False).idxmax():
+            chosen[symbol] = (window, k_low)
+
+    for symbol, (window, k_low) in chosen.items():
+        console.print(f"Using detector params for {symbol}: window={window}, k_low={k_low}")
+    return pd.MultiIndex.from_tuples(
+        [(window, k_low, symbol) for symbol, (window, k_low) in chosen.items()],
+        names=_PARAM_LEVELS,
+    )
+
+
 def run(
     config: Config,
     processed_data: dict[str, pd.DataFrame],
@@ -47,41 +343,35 @@ def run(
     """
     Main entry point for the backtesting engine.
 
-    This prepares data for vectorbt, generates signals, and runs the backtest
-    using the specified configuration. For the MVP, it uses the first parameter
-    set from the config.
+    This prepares data for vectorbt, fits detector parameters per symbol on
+    the in-sample period, generates signals, and runs the backtest using the
+    specified configuration. The portfolio's columns are
+    (window, k_low, symbol).
+
+    The backtest starts at run.t0: parameters are fitted on the bars before
+    it, so only the bars from t0 onward are simulated and reported. Earlier
+    bars still feed the rolling z-scores.
     """
     console.print("Preparing data for vectorbt...")
     open_prices, close_prices = _prepare_vbt_data(processed_data)
 
-    # TODO: Implement full walk-forward with parameter grid search.
-    # For now, use the first parameter set from the config.
-    detector_cfg = config.detector
-    window = detector_cfg.window_range[0]
-    k_low = detector_cfg.k_low_range[0]
-    console.print(f"Using detector params: window={window}, k_low={k_low}")
-
-    console.print("Generating signals for all symbols...")
-    all_signals = []
-    for symbol, df in processed_data.items():
-        signals = generate_signals(df, window=window, k_low=k_low)
-        all_signals.append(signals.rename(symbol))
-
-    entry_signals = pd.concat(all_signals, axis=1)
+    # TODO: Implement full walk-forward splits; parameters are fitted once on
+    # the period before t0.
+    fillable, slippage = _execution_costs(open_prices, close_prices, config.execution)
+    columns = _fit_params(config, processed_data, close_prices, fillable, slippage, console)
 
-    # To simulate next-day entry, we shift the signals by one day.
-    shifted_entries = entry_signals.vbt.fshift(1)
+    start = _t0_row(close_prices.index, config)
+    if start == len(close_prices.index):
+        raise ValueError(f"No price data on or after run.t0 ({config.run.t0}) to backtest.")
 
-    console.print("Running backtest with vectorbt...")
+    console.print("Generating signals for all symbols...")
+    entries = _build_entries(processed_data, close_prices.index, columns).iloc[start:]
+    entries, unfilled = _apply_circuit_guard(entries, fillable.iloc[start:])
+    if unfilled:
+        console.print(f"[yellow]{unfilled} entry signals left unfilled by the circuit guard.[/yellow]")
 
-    portfolio = vbt.Portfolio.from_signals(
-        close=close_prices,  # Use close price for transactions and valuation
-        entries=shifted_entries,
-        exits=np.nan, # Time-based exits are handled by `freq`
-        freq=f"{config.detector.max_hold}D",
-        fees=config.execution.fees_bps / 10000.0,
-        init_cash=1e9,
-    )
+    console.print(f"Running backtest with vectorbt from {close_prices.index[start].date()}...")
+    portfolio = _simulate(close_prices.iloc[start:], slippage.iloc[start:], entries, config)
 
     console.print("Backtest complete.")
     return portfolio
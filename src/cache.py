@@ -0,0 +1,123 @@
+"""
+On-disk cache of feature-processed snapshot data.
+
+A run otherwise re-reads every snapshot in the universe and recomputes its
+features, even when nothing has changed since the previous run. The processed
+frames are stored together as one Feather (Arrow IPC) file, keyed by the data
+config, the universe, the snapshot files' stat info and the feature code.
+Only the latest file is kept for each data config and universe.
+"""
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+from rich.console import Console
+
+from src import features
+from src.config import Config
+from src.data import _get_snapshot_dir, _snapshot_paths
+
+__all__ = ["load_cached_features", "save_cached_features"]
+
+
+def _cache_dir(config: Config) -> Path:
+    """The cache sits beside, not inside, the per-source snapshot directories."""
+    return config.data.snapshot_dir / "cache"
+
+
+# impure
+def _cache_key(universe: List[str], config: Config) -> Optional[str]:
+    """
+    Hashes everything the processed frames depend on.
+    Returns None if a snapshot is missing, so that the caller's normal
+    loading path reports it.
+    #impure: Reads from the filesystem.
+    """
+    parquet_paths = _snapshot_paths(_get_snapshot_dir(config), universe)
+    stats = []
+    for symbol, parquet_path in parquet_paths.items():
+        try:
+            st = os.stat(parquet_path)
+        except FileNotFoundError:
+            return None
+        stats.append((symbol, st.st_mtime_ns, st.st_size))
+
+    digest = hashlib.blake2s(repr((config.data, stats)).encode())
+    # Editing the feature code must invalidate the cache as well.
+    digest.update(Path(features.__file__).read_bytes())
+    return digest.hexdigest()
+
+
+def _cache_path(universe: List[str], config: Config, key: str) -> Path:
+    """
+    Names the cache file `<slot>-<key>.feather`, where the slot identifies
+    the data config and universe alone, so that stale keys for the same
+    slot can be found and pruned.
+    """
+    slot = hashlib.blake2s(repr((config.data, universe)).encode(), digest_size=8).hexdigest()
+    return _cache_dir(config) / f"{slot}-{key}.feather"
+
+
+# impure
+def load_cached_features(universe: List[str], config: Config) -> Optional[Dict[str, pd.DataFrame]]:
+    """
+    Returns the cached processed frames for the universe, or None on a miss.
+    #impure: Reads from the filesystem.
+    """
+    key = _cache_key(universe, config)
+    if key is None:
+        return None
+    cache_path = _cache_path(universe, config, key)
+    if not cache_path.is_file():
+        return None
+
+    try:
+        frame = pd.read_feather(cache_path)
+    except (pa.ArrowInvalid, OSError):
+        # An unreadable file is a miss; the next save replaces it.
+        return None
+    groups = {
+        symbol: group.drop(columns="symbol").set_index("Date")
+        for symbol, group in frame.groupby("symbol", sort=False)
+    }
+    # Symbols whose processed frame was empty have no rows to group, but
+    # belong to the universe all the same.
+    empty = frame.iloc[:0].drop(columns="symbol").set_index("Date")
+    return {symbol: groups.get(symbol, empty) for symbol in universe}
+
+
+# impure
+def save_cached_features(
+    processed_data: Dict[str, pd.DataFrame], universe: List[str], config: Config, console: Console
+) -> None:
+    """
+    Writes the processed frames for the universe as a single Feather file,
+    replacing the files of earlier keys for the same data config and universe.
+    The cache is an optimisation: a failed write only warns.
+    #impure: Writes to the filesystem.
+    """
+    key = _cache_key(universe, config)
+    if key is None or not processed_data:
+        return
+    cache_path = _cache_path(universe, config, key)
+
+    # Written beside the cache file and renamed over it, so that an
+    # interrupted run never leaves a truncated file under a valid key.
+    tmp_path = cache_path.with_suffix(".tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        frame = pd.concat(processed_data, names=["symbol", "Date"]).reset_index()
+        frame.to_feather(tmp_path, compression="zstd")
+        os.replace(tmp_path, cache_path)
+    except (pa.ArrowException, OSError) as e:
+        tmp_path.unlink(missing_ok=True)
+        console.print(f"[yellow]Warning: could not write the feature cache: {e}[/yellow]")
+        return
+
+    slot = cache_path.name.split("-", 1)[0]
+    for stale in cache_path.parent.glob(f"{slot}-*.feather"):
+        if stale != cache_path:
+            stale.unlink(missing_ok=True)
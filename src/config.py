@@ -8,20 +8,31 @@ and easy to debug.
 """
 
 import yaml
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields, is_dataclass
 from datetime import date
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Literal, Dict, Any
+from typing import Any, Dict, Literal, Tuple
 
 __all__ = ["load_config", "Config"]
 
+# libyaml's C parser is several times faster than the pure-Python one, but
+# safe_load only uses it when asked for explicitly.
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _YamlLoader
+
 
 # §1. Nested Configuration Dataclasses
 # --------------------------------------------------------------------------------------
 # Simple, frozen dataclasses replace Pydantic models for clarity and performance.
+# All use slots: no per-instance __dict__ and faster attribute access
+# (requires Python 3.10+). Sequences are tuples, so that a loaded config,
+# which load_config caches and shares, is immutable all the way down.
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class RunConfig:
     name: str
     t0: date
@@ -29,7 +40,7 @@ class RunConfig:
     output_dir: Path
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DataConfig:
     source: str
     interval: Literal["1d", "1wk", "1mo"]
@@ -39,47 +50,47 @@ class DataConfig:
     refresh: bool
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class UniverseConfig:
-    include_symbols: List[str]
-    exclude_symbols: List[str]
+    include_symbols: Tuple[str, ...]
+    exclude_symbols: Tuple[str, ...]
     size: int
     min_turnover: float
     min_price: float
     lookback_years: int
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DetectorConfig:
     name: str
-    window_range: List[int]
-    k_low_range: List[float]
+    window_range: Tuple[int, ...]
+    k_low_range: Tuple[float, ...]
     max_hold: int
     min_hit_rate: float
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class WalkForwardConfig:
     is_years: int
     oos_years: int
     holdout_years: int
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SlippageConfig:
     gap_2pct: float
     gap_5pct: float
     gap_high: float
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ExecutionConfig:
     circuit_guard_pct: float
     fees_bps: float
     slippage_model: SlippageConfig
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PortfolioConfig:
     max_concurrent: int
     position_size: float
@@ -87,10 +98,10 @@ class PortfolioConfig:
     reentry_lockout: bool
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ReportingConfig:
     generate_plots: bool
-    output_formats: List[Literal["json", "markdown", "csv"]]
+    output_formats: Tuple[Literal["json", "markdown", "csv"], ...]
     include_unfilled: bool
 
 
@@ -98,7 +109,7 @@ class ReportingConfig:
 # --------------------------------------------------------------------------------------
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Config:
     """The root configuration object, composing all nested sections."""
     run: RunConfig
@@ -115,20 +126,46 @@ class Config:
 # --------------------------------------------------------------------------------------
 
 
+def _to_date(value: Any) -> Any:
+    """Converts ISO date strings to date objects; anything else passes through."""
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _to_path(value: Any) -> Any:
+    """Converts path strings to Path objects; anything else passes through."""
+    return Path(value) if isinstance(value, str) else value
+
+
+def _reject_unknown_keys(data_class, data: Dict[str, Any]) -> None:
+    """Raises TypeError if `data` has keys that are not fields of `data_class`."""
+    unknown = data.keys() - data_class.__dataclass_fields__.keys()
+    if unknown:
+        raise TypeError(f"{data_class.__name__} got unexpected keys: {', '.join(sorted(unknown))}")
+
+
 def _from_dict(data_class, data: Dict[str, Any]):
-    """Recursively creates nested dataclasses from a dictionary."""
-    if isinstance(data, dict):
-        field_types = {f.name: f.type for f in data_class.__dataclass_fields__.values()}
-        return data_class(**{
-            k: _from_dict(field_types.get(k), v) for k, v in data.items()
-        })
-    # Convert date strings to date objects
-    if isinstance(data, str) and data_class is date:
-        return date.fromisoformat(data)
-    # Convert path strings to Path objects
-    if isinstance(data, str) and data_class is Path:
-        return Path(data)
-    return data
+    """
+    Recursively creates nested dataclasses from a dictionary. Missing keys
+    raise KeyError; unexpected keys and non-mapping sections raise TypeError.
+    load_config memoizes its result, so this runs once per config file
+    version and is kept as plain field introspection.
+    """
+    if not isinstance(data, dict):
+        raise TypeError(f"{data_class.__name__} must be a mapping, got {type(data).__name__}")
+    _reject_unknown_keys(data_class, data)
+    kwargs = {}
+    for f in fields(data_class):
+        value = data[f.name]
+        if is_dataclass(f.type):
+            value = _from_dict(f.type, value)
+        elif f.type is date:
+            value = _to_date(value)
+        elif f.type is Path:
+            value = _to_path(value)
+        elif isinstance(value, list):
+            value = tuple(value)
+        kwargs[f.name] = value
+    return data_class(**kwargs)
 
 
 def _validate_config(cfg: Dict[str, Any]) -> None:
@@ -139,10 +176,12 @@ def _validate_config(cfg: Dict[str, Any]) -> None:
     if not isinstance(cfg, dict):
         raise ValueError("Configuration must be a YAML object.")
 
-    # Date validation
-    run_t0 = date.fromisoformat(cfg["run"]["t0"])
-    data_start = date.fromisoformat(cfg["data"]["start_date"])
-    data_end = date.fromisoformat(cfg["data"]["end_date"])
+    # Date validation. The parsed dates are written back so that building
+    # the dataclasses does not parse them a second time; YAML may also have
+    # produced date objects already, which pass through.
+    run_t0 = cfg["run"]["t0"] = _to_date(cfg["run"]["t0"])
+    data_start = cfg["data"]["start_date"] = _to_date(cfg["data"]["start_date"])
+    data_end = cfg["data"]["end_date"] = _to_date(cfg["data"]["end_date"])
 
     if data_end <= data_start:
         raise ValueError("data.end_date must be after data.start_date")
@@ -156,6 +195,11 @@ def _validate_config(cfg: Dict[str, Any]) -> None:
     if total_wf_years <= 0:
         raise ValueError("Walk-forward years (is_years + oos_years) must be positive.")
 
+    # Positions close max_hold tradable bars after entry; with fewer than
+    # one bar they would never close and every later entry would be dropped.
+    if cfg["detector"]["max_hold"] < 1:
+        raise ValueError("detector.max_hold must be at least 1 bar.")
+
     # Add any other critical checks here.
 
 
@@ -163,14 +207,25 @@ def _validate_config(cfg: Dict[str, Any]) -> None:
 def load_config(config_path: Path) -> Config:
     """
     Loads and validates a YAML configuration file into a Config object.
+    Repeat loads of an unchanged file return the same (frozen) object.
     #impure: Reads from the filesystem.
     """
     if not config_path.is_file():
         raise FileNotFoundError(f"Configuration file not found: {config_path}")
+    return _load_config_cached(config_path.resolve(), config_path.stat().st_mtime_ns)
 
+
+# impure
+@lru_cache(maxsize=32)
+def _load_config_cached(config_path: Path, mtime_ns: int) -> Config:
+    """
+    Parses a config file once per (path, mtime). Failures raise and so are
+    never cached.
+    #impure: Reads from the filesystem.
+    """
     try:
         with config_path.open("r", encoding="utf-8") as f:
-            raw_config = yaml.safe_load(f)
+            raw_config = yaml.load(f, Loader=_YamlLoader)
     except yaml.YAMLError as e:
         raise ValueError(f"Invalid YAML syntax in {config_path}: {e}") from e
 
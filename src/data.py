@@ -1,11 +1,16 @@
 """
 Data fetching, universe selection, and snapshot management.
 """
+import os
 import subprocess
-from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import groupby, repeat
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
+import numpy as np
 import pandas as pd
 import pyarrow as pa
 import pyarrow.parquet as pq
@@ -16,20 +21,58 @@ from src.config import Config
 
 __all__ = ["fetch_and_snapshot", "load_snapshots", "discover_symbols", "select_universe"]
 
+# Downloads are network-bound, so a small thread pool overlaps the round-trips.
+_FETCH_WORKERS = 8
+
+# Failures a batch download is expected to hit: transport errors are OSError
+# subclasses (requests and curl_cffi both derive from it), empty or malformed
+# payloads surface as ValueError/KeyError, and yfinance raises YFException.
+# Anything else is a bug and should propagate. Per-symbol downloads and
+# writes instead record any failure against the symbol, so that one bad
+# ticker cannot abort the refresh of the rest.
+_FETCH_ERRORS = (OSError, ValueError, KeyError, yf.exceptions.YFException)
+
+_OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+# Prices are stored as float32: ~7 significant digits is well below NSE tick
+# size and halves the bytes read on every load. Volume keeps its source dtype
+# so that share counts stay exact.
+_PRICE_COLUMNS = ["Open", "High", "Low", "Close"]
+# Universe screening needs only the price and turnover inputs.
+_SCREEN_COLUMNS = ["Close", "Volume"]
+# Downloads are split- and dividend-adjusted, so a corporate action since the
+# last refresh rescales every stored bar. Refreshes re-download the last
+# stored bar; a close further than this from the stored one (relative, well
+# above float32 rounding) means history must be downloaded again in full.
+_ADJUSTMENT_RTOL = 1e-4
 
-def _get_run_metadata(config: Config) -> Dict[str, str]:
-    """Generates metadata for the data snapshot."""
+
+# impure
+@lru_cache(maxsize=1)
+def _git_hash() -> str:
+    """
+    Returns the short hash of the checked-out commit, or "unknown".
+    HEAD does not move during a run, so git is spawned once per process
+    rather than once per snapshot written.
+    #impure: Runs a subprocess.
+    """
     try:
-        git_hash = subprocess.check_output(
+        return subprocess.check_output(
             ["git", "rev-parse", "--short", "HEAD"]
         ).strip().decode()
     except (subprocess.CalledProcessError, FileNotFoundError):
-        git_hash = "unknown"
+        return "unknown"
+
+
+def _get_run_metadata(config: Config) -> Dict[str, str]:
+    """Generates metadata for the data snapshot."""
     return {
         "fetch_utc": datetime.now(timezone.utc).isoformat(),
         "yfinance_version": yf.__version__,
-        "git_hash": git_hash,
+        "git_hash": _git_hash(),
         "run_name": config.run.name,
+        # The requested range; incremental refreshes rely on start_date.
+        "start_date": config.data.start_date.isoformat(),
+        "end_date": config.data.end_date.isoformat(),
     }
 
 
@@ -38,12 +81,67 @@ def _get_snapshot_dir(config: Config) -> Path:
     return config.data.snapshot_dir / f"{config.data.source}_{config.data.interval}"
 
 
+def _snapshot_paths(snapshot_dir: Path, symbols: List[str]) -> Dict[str, str]:
+    """
+    Maps each symbol to its snapshot file. Plain strings are built once per
+    call, rather than a Path per symbol, and pyarrow takes them as-is.
+    """
+    base = os.fspath(snapshot_dir)
+    return {symbol: os.path.join(base, f"{symbol}.parquet") for symbol in symbols}
+
+
 def discover_symbols(config: Config) -> List[str]:
     """Discovers all available symbols by scanning the snapshot directory."""
     snapshot_dir = _get_snapshot_dir(config)
     if not snapshot_dir.exists():
         return []
-    return sorted([p.stem for p in snapshot_dir.glob("*.parquet")])
+    with os.scandir(snapshot_dir) as entries:
+        return sorted(
+            entry.name[: -len(".parquet")] for entry in entries if entry.name.endswith(".parquet")
+        )
+
+
+# impure
+def _screen_symbol(
+    parquet_path: str, lookback_start: pd.Timestamp, t0: pd.Timestamp, config: Config
+) -> Optional[float]:
+    """
+    Returns a symbol's median turnover over the lookback window, or None if
+    it fails the universe filters or its data is missing or malformed.
+    #impure: Reads from the filesystem.
+    """
+    try:
+        # Parquet is columnar: unread columns cost no I/O or decoding.
+        df = pq.read_pandas(parquet_path, columns=_SCREEN_COLUMNS, memory_map=True).to_pandas()
+
+        # Filter for the lookback period before the run's start time (t0).
+        # Snapshots are sorted by date, so the window is a row slice
+        # found by binary search, without converting each timestamp to a
+        # Python date.
+        tz = df.index.tz
+        start, end = df.index.searchsorted([lookback_start.tz_localize(tz), t0.tz_localize(tz)])
+        df_lookback = df.iloc[start:end]
+
+        if df_lookback.empty:
+            return None
+
+        # Price and turnover filters, on the raw arrays: no intermediate
+        # Series or index alignment per candidate.
+        close = df_lookback["Close"].to_numpy()
+        if close[-1] < config.universe.min_price:
+            return None
+
+        # Turnover = Close * Volume; nanmedian skips missing bars as
+        # pandas' median did.
+        median_turnover = float(np.nanmedian(close * df_lookback["Volume"].to_numpy()))
+
+    except (FileNotFoundError, KeyError, IndexError, pa.ArrowInvalid):
+        # Ignore symbols if data is missing, malformed, or has no rows in lookback.
+        return None
+
+    if median_turnover < config.universe.min_turnover:
+        return None
+    return median_turnover
 
 
 # impure
@@ -58,100 +156,246 @@ def select_universe(config: Config, console: Console) -> List[str]:
     # If no snapshots exist, fall back to the explicit list in config.
     if not all_symbols:
         console.print("[yellow]No snapshots found. Using 'include_symbols' from config.[/yellow]")
-        return config.universe.include_symbols
+        return list(config.universe.include_symbols)
 
-    t0 = config.run.t0
+    # The lookback window is [lookback_start, t0) in local exchange dates,
+    # i.e. from midnight of each bound in the snapshot's timezone.
+    t0 = pd.Timestamp(config.run.t0)
     lookback_start = t0 - pd.DateOffset(years=config.universe.lookback_years)
-    snapshot_dir = _get_snapshot_dir(config)
+    parquet_paths = _snapshot_paths(_get_snapshot_dir(config), all_symbols)
 
-    turnover_data = []
     console.print(f"Screening {len(all_symbols)} symbols for universe selection...")
-    for symbol in all_symbols:
-        try:
-            df = pd.read_parquet(snapshot_dir / f"{symbol}.parquet")
-
-            # Filter for the lookback period before the run's start time (t0)
-            # Convert timestamp to date for comparison to avoid TypeError
-            lookback_start_date = lookback_start.date()
-            df_lookback = df[(df.index.date >= lookback_start_date) & (df.index.date < t0)]
-
-            if df_lookback.empty:
-                continue
+    # Symbols are screened independently; as in load_snapshots, threads
+    # overlap the parquet reads, which release the GIL while decoding.
+    with ThreadPoolExecutor() as pool:
+        turnovers = list(pool.map(
+            _screen_symbol,
+            parquet_paths.values(),
+            repeat(lookback_start),
+            repeat(t0),
+            repeat(config),
+        ))
+
+    # Passing symbols and their median turnover are kept as two parallel
+    # columns rather than a list of per-symbol dicts.
+    passed_symbols = [s for s, turnover in zip(all_symbols, turnovers) if turnover is not None]
+    median_turnovers = [turnover for turnover in turnovers if turnover is not None]
+
+    if not passed_symbols:
+        console.print("[bold red]Error: No symbols passed the universe selection criteria.[/bold red]")
+        return []
 
-            # Price and turnover filters
-            last_close = df_lookback["Close"].iloc[-1]
-            if last_close < config.universe.min_price:
-                continue
+    # Rank by median turnover and select the top N symbols; the stable sort
+    # keeps ties in discovery (alphabetical) order.
+    ranking = np.argsort(-np.asarray(median_turnovers), kind="stable")
+    selected_symbols = [passed_symbols[i] for i in ranking[:config.universe.size]]
 
-            # Turnover = Close * Volume
-            df_lookback = df_lookback.assign(Turnover=df_lookback["Close"] * df_lookback["Volume"])
-            median_turnover = df_lookback["Turnover"].median()
+    # Apply manual exclusions; a set makes each membership test O(1).
+    excluded = set(config.universe.exclude_symbols)
+    final_universe = [s for s in selected_symbols if s not in excluded]
 
-            if median_turnover < config.universe.min_turnover:
-                continue
+    console.print(f"Selected {len(final_universe)} symbols for the universe.")
+    return final_universe
 
-            turnover_data.append({"symbol": symbol, "median_turnover": median_turnover})
 
-        except (FileNotFoundError, KeyError, IndexError):
-            # Ignore symbols if data is missing, malformed, or has no rows in lookback.
-            continue
+# impure
+def _fetch_start(parquet_path: str, config: Config) -> Optional[date]:
+    """
+    Returns the first date to download for a snapshot, or None if it is
+    already current. An existing snapshot is extended from its last bar,
+    which is downloaded again to check the stored adjustment, only when it
+    was fetched from the configured start date or earlier; anything else is
+    downloaded in full.
+    #impure: Reads from the filesystem.
+    """
+    if not os.path.isfile(parquet_path):
+        return config.data.start_date
 
-    if not turnover_data:
-        console.print("[bold red]Error: No symbols passed the universe selection criteria.[/bold red]")
-        return []
+    try:
+        metadata = pq.read_schema(parquet_path).metadata or {}
+        stored_start = metadata.get(b"start_date")
+        if stored_start is None or date.fromisoformat(stored_start.decode()) > config.data.start_date:
+            return config.data.start_date
+
+        # Reading no columns still materialises the index.
+        index = pd.read_parquet(parquet_path, columns=[]).index
+    except (pa.ArrowInvalid, OSError):
+        # A corrupt or truncated snapshot is replaced by a full download.
+        return config.data.start_date
+    if not isinstance(index, pd.DatetimeIndex) or index.empty:
+        return config.data.start_date
+    last = index.max().date()
+    # yfinance treats `end` as exclusive.
+    return last if last + timedelta(days=1) < config.data.end_date else None
+
+
+def _is_readjusted(stored: pd.DataFrame, data: pd.DataFrame) -> bool:
+    """
+    Returns whether a refresh disagrees with the snapshot on its last stored
+    bar, i.e. the stored history no longer matches the current adjustment.
+    """
+    last = stored.index.max()
+    if last not in data.index:
+        return True
+    return not np.isclose(data.at[last, "Close"], stored.at[last, "Close"], rtol=_ADJUSTMENT_RTOL)
 
-    # Rank by median turnover and select the top N symbols
-    ranked_symbols = sorted(turnover_data, key=lambda x: x["median_turnover"], reverse=True)
 
-    selected_symbols = [d["symbol"] for d in ranked_symbols[:config.universe.size]]
+# impure
+def _download_batch(symbols: List[str], start: date, config: Config) -> pd.DataFrame:
+    """
+    Downloads OHLCV bars for all symbols in one batched request.
+    #impure: Accesses network.
+    """
+    return yf.download(
+        tickers=symbols,
+        start=start,
+        end=config.data.end_date,
+        interval=config.data.interval,
+        auto_adjust=True,
+        prepost=False,
+        actions=False,
+        group_by="ticker",
+        threads=True,
+        ignore_tz=False,  # Keep the exchange timezone, as Ticker.history does.
+        progress=False,
+    )
+
+
+def _split_batch(batch: pd.DataFrame, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+    """Splits a ticker-grouped batch download into per-symbol frames."""
+    if batch.empty or not isinstance(batch.columns, pd.MultiIndex):
+        return {}
+
+    returned = set(batch.columns.get_level_values(0))
+    frames = {}
+    for symbol in symbols:
+        if symbol not in returned:
+            continue
+        # The batch index is the union of all symbols' dates; drop the
+        # rows on which this symbol did not trade.
+        data = batch[symbol].dropna(how="all").rename_axis(columns=None)
+        if not data.empty:
+            frames[symbol] = data
+    return frames
 
-    # Apply manual exclusions
-    final_universe = [s for s in selected_symbols if s not in config.universe.exclude_symbols]
 
-    console.print(f"Selected {len(final_universe)} symbols for the universe.")
-    return final_universe
+# impure
+def _download(symbol: str, start: date, config: Config) -> pd.DataFrame:
+    """
+    Downloads OHLCV bars for a single symbol.
+    #impure: Accesses network.
+    """
+    # A Ticker per call keeps worker threads from sharing yfinance's global
+    # download state.
+    return yf.Ticker(symbol).history(
+        start=start,
+        end=config.data.end_date,
+        interval=config.data.interval,
+        auto_adjust=True,
+        prepost=False,
+        actions=False,
+    )
 
 
 # impure
 def fetch_and_snapshot(symbols: List[str], config: Config) -> List[str]:
     """
     Fetch data from yfinance and save to parquet snapshots.
+    Existing snapshots are extended with the bars after their last date
+    rather than downloaded again, unless a corporate action has changed the
+    adjusted prices since; see `_fetch_start`.
     Returns a list of symbols that failed to download.
     #impure: Accesses network and filesystem.
     """
     snapshot_dir = _get_snapshot_dir(config)
     snapshot_dir.mkdir(parents=True, exist_ok=True)
 
-    failed_symbols = []
-    for symbol in symbols:
+    parquet_paths = _snapshot_paths(snapshot_dir, symbols)
+    starts = {symbol: _fetch_start(parquet_paths[symbol], config) for symbol in symbols}
+    pending = [s for s in symbols if starts[s] is not None]
+
+    # One batched request per distinct start date covers most symbols; after
+    # the first refresh they usually share one. Anything missing from the
+    # batch response is retried individually.
+    frames: Dict[str, pd.DataFrame] = {}
+    for start, group in groupby(sorted(pending, key=starts.__getitem__), key=starts.__getitem__):
+        batch_symbols = list(group)
         try:
-            data = yf.download(
-                tickers=symbol,
-                start=config.data.start_date,
-                end=config.data.end_date,
-                interval=config.data.interval,
-                auto_adjust=True,
-                prepost=False,
-                actions=False,
-                progress=False,
-            )
-            if data.empty:
-                raise ValueError(f"No data returned for symbol {symbol}")
-
-            table = pa.Table.from_pandas(data)
-            metadata = _get_run_metadata(config)
-            table = table.replace_schema_metadata({
-                **table.schema.metadata,
-                **{k.encode(): str(v).encode() for k, v in metadata.items()}
-            })
-            pq.write_table(table, snapshot_dir / f"{symbol}.parquet")
-
-        except Exception:
-            failed_symbols.append(symbol)
+            frames.update(_split_batch(_download_batch(batch_symbols, start, config), batch_symbols))
+        except _FETCH_ERRORS:
+            pass
+    retry_symbols = [s for s in pending if s not in frames]
+
+    failed_symbols = []
+    with ThreadPoolExecutor(max_workers=_FETCH_WORKERS) as pool:
+        futures = {symbol: pool.submit(_download, symbol, starts[symbol], config) for symbol in retry_symbols}
+        # Snapshots are written from this thread, in input order.
+        for symbol in pending:
+            parquet_path = parquet_paths[symbol]
+            incremental = starts[symbol] != config.data.start_date
+            try:
+                data = frames[symbol] if symbol in frames else futures[symbol].result()
+                if data.empty:
+                    if incremental:
+                        continue  # No new bars since the last refresh.
+                    raise ValueError(f"No data returned for symbol {symbol}")
+
+                if incremental:
+                    stored = pd.read_parquet(parquet_path)
+                    if _is_readjusted(stored, data):
+                        data = _download(symbol, config.data.start_date, config)
+                        if data.empty:
+                            raise ValueError(f"No data returned for symbol {symbol}")
+                    else:
+                        data = data[data.index > stored.index.max()]
+                        if data.empty:
+                            continue  # No new bars since the last refresh.
+                        data = pd.concat([stored, data])
+
+                data = data.astype({c: "float32" for c in _PRICE_COLUMNS if c in data.columns})
+                table = pa.Table.from_pandas(data)
+                metadata = _get_run_metadata(config)
+                table = table.replace_schema_metadata({
+                    **table.schema.metadata,
+                    **{k.encode(): str(v).encode() for k, v in metadata.items()}
+                })
+                # Written beside the snapshot and renamed over it, so that an
+                # interrupted refresh never leaves a truncated snapshot.
+                tmp_path = f"{parquet_path}.tmp"
+                pq.write_table(
+                    table,
+                    tmp_path,
+                    compression="zstd",
+                    compression_level=3,
+                    use_dictionary=True,
+                )
+                os.replace(tmp_path, parquet_path)
+
+            except Exception:
+                failed_symbols.append(symbol)
 
     return failed_symbols
 
 
+# impure
+def _read_snapshot(symbol: str, parquet_path: str) -> pd.DataFrame:
+    """
+    Reads the OHLCV columns of a single snapshot.
+    #impure: Reads from the filesystem.
+    """
+    try:
+        # Only OHLCV is used downstream; parquet skips the other columns.
+        # Files are already read in parallel by the caller, so each read is
+        # single-threaded. Converting without consolidating the columns into
+        # one block, and freeing Arrow buffers as they convert, halves the
+        # peak memory and copies of the pandas conversion. Memory-mapping
+        # reads the file through the page cache instead of buffered reads.
+        table = pq.read_pandas(parquet_path, columns=_OHLCV_COLUMNS, use_threads=False, memory_map=True)
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+    except pa.ArrowInvalid as e:
+        raise ValueError(f"Data for {symbol} is missing required columns.") from e
+
+
 # impure
 def load_snapshots(
     symbols: List[str], config: Config, console: Console
@@ -165,18 +409,16 @@ def load_snapshots(
         console.print(f"[bold red]Snapshot directory not found: {snapshot_dir}[/bold red]")
         raise FileNotFoundError(f"Snapshot directory not found: {snapshot_dir}")
 
-    loaded_data = {}
-    for symbol in symbols:
-        parquet_path = snapshot_dir / f"{symbol}.parquet"
-        if not parquet_path.is_file():
-            console.print(f"[bold red]Missing snapshot for symbol: {symbol} at {parquet_path}[/bold red]")
-            raise FileNotFoundError(f"Missing snapshot for symbol: {symbol} at {parquet_path}")
-
-        df = pd.read_parquet(parquet_path)
-        required_cols = {"Open", "High", "Low", "Close", "Volume"}
-        if not required_cols.issubset(df.columns):
-            raise ValueError(f"Data for {symbol} is missing required columns.")
-
-        loaded_data[symbol] = df
-
-    return loaded_data
+    # One directory listing instead of a stat per symbol.
+    with os.scandir(snapshot_dir) as entries:
+        available = {entry.name for entry in entries if entry.is_file()}
+    missing = [s for s in symbols if f"{s}.parquet" not in available]
+    if missing:
+        console.print(f"[bold red]Missing snapshots in {snapshot_dir} for: {', '.join(missing)}[/bold red]")
+        raise FileNotFoundError(f"Missing snapshots in {snapshot_dir} for: {', '.join(missing)}")
+    parquet_paths = _snapshot_paths(snapshot_dir, symbols)
+
+    # pyarrow releases the GIL while decoding, so threads overlap the reads.
+    with ThreadPoolExecutor() as pool:
+        frames = pool.map(_read_snapshot, symbols, [parquet_paths[s] for s in symbols])
+        return dict(zip(symbols, frames))
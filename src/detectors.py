@@ -2,26 +2,129 @@
 Signal detection logic.
 
 For the MVP, this contains the Gap-Z detector. The functions are pure,
-taking a DataFrame and parameters, and returning a signal Series.
+taking gap data and parameters, and returning signals. The rolling z-score
+is a numba kernel so that every (symbol, window) series of a backtest is
+evaluated in one parallel call; thresholding by k_low is a cheap compare
+on top.
 """
 
+import numpy as np
 import pandas as pd
+from numba import njit, prange
 
-__all__ = ["generate_signals"]
+__all__ = ["generate_signals", "rolling_zscores", "zscore_signal_rows", "zscore_signals"]
 
 
-def _rolling_zscore(series: pd.Series, window: int, min_periods: int = None) -> pd.Series:
+# fastmath is deliberately off: it lets LLVM assume no NaNs, which would
+# break the missing-value handling below.
+@njit(parallel=True, cache=True)
+def _rolling_zscore_kernel(gaps: np.ndarray, windows: np.ndarray) -> np.ndarray:
     """
-    Calculates the rolling z-score of a time series.
-    z = (value - rolling_mean) / rolling_std
+    Computes the rolling z-score of each column with its own window.
+
+    Matches pandas' rolling mean/std (ddof=1) with min_periods = window // 2:
+    NaNs inside a window are skipped, and a window with too few values or
+    zero spread gives NaN. The mean and squared deviations are updated
+    online (Welford) as values enter and leave the window, so each row
+    costs O(1) rather than O(window).
     """
-    if min_periods is None:
-        min_periods = window // 2  # A reasonable default
-    rolling_mean = series.rolling(window=window, min_periods=min_periods).mean()
-    rolling_std = series.rolling(window=window, min_periods=min_periods).std()
-    # Avoid division by zero; replace std=0 with a small epsilon or NaN
-    rolling_std = rolling_std.replace(0, pd.NA)
-    return (series - rolling_mean) / rolling_std
+    n_rows, n_cols = gaps.shape
+    out = np.full((n_rows, n_cols), np.nan)
+    for j in prange(n_cols):
+        window = windows[j]
+        min_periods = max(window // 2, 1)
+        count = 0
+        mean = 0.0
+        m2 = 0.0
+        # Like pandas, a run of identical values covering the whole window
+        # is exactly flat, whatever rounding the online update left in m2.
+        same_run = 0
+        prev = np.nan
+        for t in range(n_rows):
+            value = gaps[t, j]
+            if not np.isnan(value):
+                count += 1
+                delta = value - mean
+                mean += delta / count
+                m2 += delta * (value - mean)
+                same_run = same_run + 1 if value == prev else 1
+                prev = value
+            if t >= window:
+                old = gaps[t - window, j]
+                if not np.isnan(old):
+                    count -= 1
+                    if count == 0:
+                        mean = 0.0
+                        m2 = 0.0
+                    else:
+                        delta = old - mean
+                        mean -= delta / count
+                        m2 -= delta * (old - mean)
+            if np.isnan(value) or count < min_periods or count < 2 or same_run >= count:
+                continue
+            variance = m2 / (count - 1)
+            if variance > 0.0:
+                out[t, j] = (value - mean) / np.sqrt(variance)
+    return out
+
+
+def rolling_zscores(gaps: np.ndarray, windows: np.ndarray) -> np.ndarray:
+    """
+    Computes Gap-Z z-scores for many series at once.
+
+    Args:
+        gaps: A (rows x columns) float matrix of gap percentages. Each column
+            is one series; trailing NaN padding is ignored. float32 input is
+            read as is; the kernel accumulates in float64 either way.
+        windows: The rolling window for each column.
+
+    Returns:
+        A float64 matrix of the same shape as `gaps`; NaN where undefined.
+    """
+    gaps = np.asarray(gaps)
+    if gaps.dtype != np.float32:
+        gaps = gaps.astype(np.float64, copy=False)
+    return _rolling_zscore_kernel(gaps, np.asarray(windows, dtype=np.int64))
+
+
+def zscore_signals(z_scores: np.ndarray, k_lows: np.ndarray) -> np.ndarray:
+    """
+    Thresholds z-scores into entry signals, one k_low per column.
+
+    The z-score depends only on the window, so one z-score column can be
+    thresholded by many k_low values without recomputing it. See also
+    `zscore_signal_rows`, which returns signal rows rather than a mask.
+
+    Returns:
+        A boolean matrix; NaN z-scores never signal.
+    """
+    k_lows = np.asarray(k_lows, dtype=np.float64)
+    if (k_lows >= 0).any():
+        raise ValueError("k_low threshold must be a negative value for this strategy.")
+    return z_scores < k_lows
+
+
+def zscore_signal_rows(
+    z_scores: np.ndarray, series_of_column: np.ndarray, k_lows: np.ndarray
+) -> list[np.ndarray]:
+    """
+    Returns the signal rows of each column, where column j thresholds
+    z-score series `series_of_column[j]` by `k_lows[j]`.
+
+    Each z-score series is sorted once; the rows below any k_low are then a
+    prefix of the sort order found by binary search, so many k_low values
+    cost no extra pass over the series. NaN sorts last and never signals.
+    Rows are returned in z-score order, not time order.
+    """
+    k_lows = np.asarray(k_lows, dtype=np.float64)
+    if (k_lows >= 0).any():
+        raise ValueError("k_low threshold must be a negative value for this strategy.")
+    order = np.argsort(z_scores, axis=0)
+    sorted_z = np.take_along_axis(z_scores, order, axis=0)
+    return [
+        order[: np.searchsorted(sorted_z[:, i], k_low), i]
+        for i, k_low in zip(series_of_column, k_lows)
+    ]
 
 
 def generate_signals(df: pd.DataFrame, window: int, k_low: float) -> pd.Series:
@@ -47,9 +150,6 @@ def generate_signals(df: pd.DataFrame, window: int, k_low: float) -> pd.Series:
     if k_low >= 0:
         raise ValueError("k_low threshold must be a negative value for this strategy.")
 
-    z_scores = _rolling_zscore(df["gap_pct"], window=window)
-
-    # The signal is True when the z-score is below the negative threshold (e.g., < -2.0)
-    signals = z_scores < k_low
-
-    return signals
+    gaps = df["gap_pct"].to_numpy(dtype=np.float64).reshape(-1, 1)
+    z_scores = rolling_zscores(gaps, np.array([window]))
+    return pd.Series(zscore_signals(z_scores, np.array([k_low]))[:, 0], index=df.index)
@@ -26,12 +26,14 @@ def add_features(df: pd.DataFrame) -> pd.DataFrame:
     if not all(col in df.columns for col in ["Open", "Close", "Volume"]):
         raise ValueError("Input DataFrame must contain 'Open', 'Close', and 'Volume' columns.")
 
-    # Work on a copy to avoid side effects
-    df_out = df.copy()
-
-    # Simple, direct calculations as per design.
-    df_out["Turnover"] = df_out["Close"] * df_out["Volume"]
-    df_out["returns"] = df_out["Close"].pct_change()
-    df_out["gap_pct"] = (df_out["Open"] - df_out["Close"].shift(1)) / df_out["Close"].shift(1)
-
-    return df_out
+    # assign returns a new frame, so the input is left untouched; under
+    # copy-on-write the existing OHLCV columns are shared, not copied.
+    # Both returns and gaps are relative to the previous close, which is
+    # shifted once and shared.
+    close = df["Close"]
+    prev_close = close.shift(1)
+    return df.assign(
+        Turnover=close * df["Volume"],
+        returns=close / prev_close - 1,
+        gap_pct=(df["Open"] - prev_close) / prev_close,
+    )
@@ -2,9 +2,13 @@
 Generating output reports from a vectorbt backtest.
 """
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Optional
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 
 import vectorbt as vbt
 from rich.console import Console
@@ -16,44 +20,88 @@ __all__ = ["generate_all_reports"]
 
 def _to_json_serializable(data):
     """Recursively converts non-serializable types in a dictionary."""
-    if isinstance(data, dict):
-        return {k: _to_json_serializable(v) for k, v in data.items()}
-    if isinstance(data, list):
-        return [_to_json_serializable(i) for i in data]
-    if isinstance(data, (Path, pd.Timestamp, pd.Timedelta)):
-        return str(data)
-    if pd.isna(data) or data is None:
-        return None
-    # Convert numpy types to native Python types
-    if isinstance(data, (np.integer, np.int64)):
+    # Nearly every value in portfolio.stats() has one of a few exact types,
+    # so one dict lookup dispatches it.
+    converter = _JSON_CONVERTERS.get(type(data))
+    if converter is not None:
+        return converter(data)
+    # Fallbacks for what the table cannot key on: other numpy scalar
+    # types, NaT (its own type) and concrete Path subclasses.
+    if isinstance(data, np.integer):
         return int(data)
-    if isinstance(data, (np.floating, np.float64)):
-        return float(data)
-    if isinstance(data, np.bool_):
-        return bool(data)
+    if isinstance(data, np.floating):
+        return _float_or_none(data)
+    if data is pd.NaT:
+        return None
+    if isinstance(data, Path):
+        return str(data)
     return data
 
 
+def _dict_to_json(data: dict) -> dict:
+    return {k: _to_json_serializable(v) for k, v in data.items()}
+
+
+def _list_to_json(data: list) -> list:
+    return [_to_json_serializable(i) for i in data]
+
+
+def _float_or_none(value) -> Optional[float]:
+    """NaN is not valid JSON; it becomes null."""
+    return None if value != value else float(value)
+
+
+def _identity(value):
+    return value
+
+
+# Exact-type dispatch for _to_json_serializable.
+_JSON_CONVERTERS = {
+    dict: _dict_to_json,
+    list: _list_to_json,
+    str: _identity,
+    int: _identity,
+    bool: _identity,
+    type(None): _identity,
+    float: _float_or_none,
+    np.float64: _float_or_none,
+    np.float32: _float_or_none,
+    np.int64: int,
+    np.int32: int,
+    np.bool_: bool,
+    pd.Timestamp: str,
+    pd.Timedelta: str,
+}
+
+
 # impure
 def _generate_trade_ledger_csv(portfolio: vbt.Portfolio, output_dir: Path) -> None:
     """Generates a CSV file with all trade details."""
-    # vectorbt's trades record is comprehensive.
-    trades = portfolio.trades.records
+    # vectorbt's trades record is comprehensive. Its fields become Arrow
+    # columns directly, without a DataFrame, and Arrow's C++ writer formats
+    # them instead of pandas' Python-level CSV writer.
+    trades = portfolio.trades.records_arr
     if len(trades) > 0:
-        trades_df = pd.DataFrame(trades)
-        trades_df.to_csv(output_dir / "trade_ledger.csv", index=False)
+        table = pa.table({name: trades[name] for name in trades.dtype.names})
+        # Arrow quotes header names; the plain header is written by hand
+        # so that readers see the same columns as vectorbt's records.
+        with (output_dir / "trade_ledger.csv").open("wb") as f:
+            f.write((",".join(trades.dtype.names) + "\n").encode())
+            pa_csv.write_csv(table, f, write_options=pa_csv.WriteOptions(include_header=False))
 
 
 # impure
-def _generate_summary_json(portfolio: vbt.Portfolio, config: Config, output_dir: Path) -> None:
+def _generate_summary_json(
+    portfolio: vbt.Portfolio, stats: pd.Series, config: Config, output_dir: Path
+) -> None:
     """Generates a JSON file with summary metrics."""
-    # portfolio.stats() returns a Series with many metrics.
-    stats = portfolio.stats()
     summary = {
         "run_name": config.run.name,
+        # Parameters are fitted per symbol; the backtest records them as
+        # the (window, k_low, symbol) column levels.
         "detector_params": {
-            "window": config.detector.window_range[0],
-            "k_low": config.detector.k_low_range[0],
+            symbol: {"window": int(window), "k_low": float(k_low)}
+            for window, k_low, symbol in portfolio.wrapper.columns
         },
         "metrics": _to_json_serializable(stats.to_dict()),
     }
@@ -62,23 +110,18 @@ def _generate_summary_json(portfolio: vbt.Portfolio, config: Config, output_dir:
 
 
 # impure
-def _generate_summary_markdown(portfolio: vbt.Portfolio, config: Config, output_dir: Path) -> None:
+def _generate_summary_markdown(stats: pd.Series, config: Config, output_dir: Path) -> None:
     """Generates a Markdown file with a human-readable summary."""
-    stats = portfolio.stats()
-    md = f"# Backtest Summary: {config.run.name}\n\n"
-    md += "## Key Metrics\n\n"
-
     key_metrics = [
         "Total Return [%]", "Max Drawdown [%]", "Sharpe Ratio",
         "Win Rate [%]", "Total Trades", "Avg Winning Trade [%]", "Avg Losing Trade [%]"
     ]
 
-    for metric in key_metrics:
-        if metric in stats:
-            value = stats[metric]
-            md += f"- **{metric}**: {value:.2f}\n"
+    # Lines are collected and joined once rather than grown with +=.
+    lines = [f"# Backtest Summary: {config.run.name}", "", "## Key Metrics", ""]
+    lines.extend(f"- **{metric}**: {stats[metric]:.2f}" for metric in key_metrics if metric in stats)
 
-    (output_dir / "summary.md").write_text(md)
+    (output_dir / "summary.md").write_text("\n".join(lines) + "\n")
 
 
 # impure
@@ -98,17 +141,28 @@ def generate_all_reports(
 
     formats = config.reporting.output_formats
 
-    if "csv" in formats:
-        console.print("Generating trade ledger CSV...")
-        _generate_trade_ledger_csv(portfolio, run_dir)
+    # portfolio.stats() returns a Series with many metrics. It is the
+    # expensive part of the summaries, so it is computed once for both.
+    stats = portfolio.stats() if "json" in formats or "markdown" in formats else None
+
+    # The writers are independent file writes, so they run concurrently.
+    with ThreadPoolExecutor() as pool:
+        futures = []
+        if "csv" in formats:
+            console.print("Generating trade ledger CSV...")
+            futures.append(pool.submit(_generate_trade_ledger_csv, portfolio, run_dir))
+
+        if "json" in formats:
+            console.print("Generating summary JSON...")
+            futures.append(pool.submit(_generate_summary_json, portfolio, stats, config, run_dir))
 
-    if "json" in formats:
-        console.print("Generating summary JSON...")
-        _generate_summary_json(portfolio, config, run_dir)
+        if "markdown" in formats:
+            console.print("Generating summary Markdown...")
+            futures.append(pool.submit(_generate_summary_markdown, stats, config, run_dir))
 
-    if "markdown" in formats:
-        console.print("Generating summary Markdown...")
-        _generate_summary_markdown(portfolio, config, run_dir)
+        # Re-raise any writer's exception here, as the sequential calls did.
+        for future in futures:
+            future.result()
 
     # Optional: Generate plots if specified
     if config.reporting.generate_plots:
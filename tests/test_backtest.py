@@ -10,9 +10,15 @@ import pandas as pd
 import pytest
 import vectorbt as vbt
 from rich.console import Console
+from types import SimpleNamespace
+from unittest.mock import patch
 
-from src.config import Config, _from_dict
-from src.backtest import run as run_backtest
+from src.config import Config, ExecutionConfig, SlippageConfig, _from_dict
+from src.detectors import rolling_zscores
+from src.backtest import (
+    run as run_backtest, _apply_circuit_guard, _execution_costs, _fit_params, _hold_exits_kernel, _prepare_vbt_data,
+    _simulate, _trade_scores,
+)
 
 # A complete and valid dictionary for creating a Config object in tests.
 FULL_CONFIG_DICT = {
@@ -73,3 +79,260 @@ def test_run_backtest(test_config: Config, processed_data: dict[str, pd.DataFram
     # For now, we just assert that the backtest ran and produced stats.
     assert portfolio.stats() is not None
     assert "Total Return [%]" in portfolio.stats()
+
+
+def test_prepare_vbt_data_aligns_symbols():
+    """Tests that price matrices share one date index, with NaN where a symbol has no bar."""
+    dates = pd.date_range(start="2023-01-02", periods=3, freq="D")
+    data = {
+        "A.NS": pd.DataFrame({"Open": [1.0, 2.0, 3.0], "Close": [1.5, 2.5, 3.5], "Volume": [1, 2, 3]}, index=dates),
+        "B.NS": pd.DataFrame({"Open": [5.0, 6.0], "Close": [5.5, 6.5], "Volume": [1, 2]}, index=dates[1:]),
+    }
+
+    open_prices, close_prices = _prepare_vbt_data(data)
+
+    assert list(open_prices.columns) == ["A.NS", "B.NS"]
+    assert list(close_prices.columns) == ["A.NS", "B.NS"]
+    assert open_prices.index.equals(dates)
+    assert np.isnan(open_prices.loc[dates[0], "B.NS"])
+    assert close_prices.loc[dates[2], "B.NS"] == 6.5
+
+
+def test_prepare_vbt_data_shared_index_matches_concat():
+    """Tests that symbols on one calendar are stacked into the same matrices concat would build."""
+    dates = pd.date_range(start="2023-01-02", periods=3, freq="D")
+    data = {
+        "A.NS": pd.DataFrame({"Open": [1.0, 2.0, 3.0], "Close": [1.5, 2.5, 3.5]}, index=dates, dtype="float32"),
+        "B.NS": pd.DataFrame({"Open": [5.0, 6.0, 7.0], "Close": [5.5, 6.5, 7.5]}, index=dates, dtype="float32"),
+    }
+
+    open_prices, close_prices = _prepare_vbt_data(data)
+
+    combined = pd.concat({symbol: df for symbol, df in data.items()}, axis=1)
+    pd.testing.assert_frame_equal(open_prices, combined.xs("Open", axis=1, level=1))
+    pd.testing.assert_frame_equal(close_prices, combined.xs("Close", axis=1, level=1))
+
+
+def test_run_backtest_shifts_entries_to_next_day(test_config: Config, processed_data: dict[str, pd.DataFrame]):
+    """Tests that entries reach the simulation as a bool matrix, one bar after the signal."""
+    with patch("src.backtest._hold_exits_kernel", wraps=_hold_exits_kernel) as mock_kernel:
+        run_backtest(test_config, processed_data, Console())
+
+    entries = mock_kernel.call_args.args[0]
+    assert entries.dtype == bool
+    # The signal is on bar 50; the simulation starts at t0, after 14 bars.
+    assert entries[51 - 14, 0]
+
+
+def test_run_backtest_reports_from_t0(test_config: Config, processed_data: dict[str, pd.DataFrame]):
+    """Tests that the in-sample bars before t0 are not simulated or reported."""
+    portfolio = run_backtest(test_config, processed_data, Console())
+
+    assert portfolio.wrapper.index[0] == pd.Timestamp("2023-01-15")
+    assert len(portfolio.wrapper.index) == 100 - 14
+
+
+def test_run_backtest_without_bars_after_t0_raises(processed_data: dict[str, pd.DataFrame]):
+    """Tests that a t0 after the last bar is an error rather than an empty backtest."""
+    config_dict = copy.deepcopy(FULL_CONFIG_DICT)
+    config_dict["run"]["t0"] = date(2024, 1, 1)
+    config = _from_dict(Config, config_dict)
+
+    with pytest.raises(ValueError, match="No price data on or after run.t0"):
+        run_backtest(config, processed_data, Console())
+
+
+def test_run_backtest_closes_positions_after_max_hold(test_config: Config, processed_data: dict[str, pd.DataFrame]):
+    """Tests that every backtest trade closes exactly max_hold bars after entry, at most one at a time."""
+    trades = run_backtest(test_config, processed_data, Console()).trades.records
+
+    closed = trades[trades["status"] == 1]
+    assert len(closed) > 1
+    assert (closed["exit_idx"] - closed["entry_idx"] == test_config.detector.max_hold).all()
+    # A new position only opens once the previous one has closed.
+    assert (trades["entry_idx"].to_numpy()[1:] >= trades["exit_idx"].to_numpy()[:-1]).all()
+
+
+def test_hold_exits_kernel():
+    """Tests that each fill exits after max_hold tradable bars and entries while holding are dropped."""
+    entries = np.zeros((12, 1), dtype=bool)
+    entries[[0, 2, 6], 0] = True
+    tradable = np.ones((12, 1), dtype=bool)
+    tradable[8, 0] = False  # A bar the symbol did not trade.
+
+    filled, exits = _hold_exits_kernel(entries, tradable, 3)
+
+    assert list(np.flatnonzero(filled[:, 0])) == [0, 6]
+    assert list(np.flatnonzero(exits[:, 0])) == [3, 10]
+
+
+def test_simulate_charges_gap_slippage_on_entries_only(test_config: Config):
+    """Tests that entries pay their bar's gap slippage and exits fill at the close."""
+    dates = pd.date_range(start="2023-01-02", periods=8, freq="D")
+    close_prices = pd.DataFrame({"TEST.NS": [100.0] * 8}, index=dates)
+    slippage = pd.DataFrame({"TEST.NS": [0.002, 0.001] + [0.002] * 6}, index=dates)
+    columns = pd.MultiIndex.from_tuples([(5, -1.0, "TEST.NS")], names=["window", "k_low", "symbol"])
+    entries = pd.DataFrame(False, index=dates, columns=columns)
+    entries.iloc[1, 0] = True
+
+    orders = _simulate(close_prices, slippage, entries, test_config).orders.records
+
+    assert list(orders["idx"]) == [1, 1 + test_config.detector.max_hold]
+    np.testing.assert_allclose(orders["price"], [100.1, 100.0])
+
+
+def _grid_config() -> Config:
+    """Builds a config with a 2 x 2 detector grid fitted before 2023-03-15."""
+    config_dict = copy.deepcopy(FULL_CONFIG_DICT)
+    config_dict["run"]["t0"] = date(2023, 3, 15)
+    config_dict["detector"]["window_range"] = [5, 10]
+    config_dict["detector"]["k_low_range"] = [-1.0, -2.0]
+    config_dict["detector"]["min_hit_rate"] = 0.4
+    return _from_dict(Config, config_dict)
+
+
+def test_run_backtest_fits_params_on_in_sample(test_config: Config, processed_data: dict[str, pd.DataFrame]):
+    """Tests that a parameter grid is fitted per symbol and recorded in the portfolio columns."""
+    config = _grid_config()
+
+    with patch("src.backtest.vbt.Portfolio.from_signals", wraps=vbt.Portfolio.from_signals) as mock_from_signals, \
+            patch("src.backtest.rolling_zscores", wraps=rolling_zscores) as mock_zscores:
+        portfolio = run_backtest(config, processed_data, Console())
+
+    # Z-scores are computed once per window, not once per (window, k_low).
+    assert mock_zscores.call_args_list[0].args[0].shape[1] == 2
+
+    # One call sweeps the whole grid on the in-sample bars, one runs the backtest.
+    assert mock_from_signals.call_count == 2
+    sweep_entries = mock_from_signals.call_args_list[0].kwargs["entries"]
+    assert sweep_entries.shape[1] == 4
+    assert sweep_entries.index.max() < pd.Timestamp("2023-03-15")
+
+    assert portfolio.wrapper.columns.names == ["window", "k_low", "symbol"]
+    (window, k_low, symbol), = portfolio.wrapper.columns
+    assert symbol == "TEST.NS"
+    assert window in (5, 10) and k_low in (-1.0, -2.0)
+
+
+def _fit_inputs(config: Config, processed_data: dict[str, pd.DataFrame]) -> tuple:
+    """Prepares the price and execution matrices that _fit_params takes."""
+    open_prices, close_prices = _prepare_vbt_data(processed_data)
+    fillable, slippage = _execution_costs(open_prices, close_prices, config.execution)
+    return close_prices, fillable, slippage
+
+
+def test_fit_params_scores_each_trade_with_its_own_column(processed_data: dict[str, pd.DataFrame]):
+    """Tests that the sweep scores every closed trade's return under that trade's own column."""
+    config = _grid_config()
+    close_prices, fillable, slippage = _fit_inputs(config, processed_data)
+
+    portfolios = []
+
+    def simulate(*args, **kwargs):
+        portfolios.append(_simulate(*args, **kwargs))
+        return portfolios[-1]
+
+    with patch("src.backtest._simulate", side_effect=simulate), \
+            patch("src.backtest._trade_scores", wraps=_trade_scores) as mock_scores:
+        _fit_params(config, processed_data, close_prices, fillable, slippage, Console())
+
+    records = portfolios[0].trades.records
+    closed = records[records["status"] == 1]
+    assert len(closed) > 1 and closed["col"].nunique() > 1
+    cols, returns, _ = mock_scores.call_args.args
+    # Realigning the returns by column label would pair them with the
+    # wrong trades.
+    np.testing.assert_array_equal(cols, closed["col"].to_numpy())
+    np.testing.assert_array_equal(returns, closed["return"].to_numpy())
+
+
+def test_fit_params_ignores_trades_open_at_t0(processed_data: dict[str, pd.DataFrame]):
+    """Tests that trades left open at t0 are not scored, even with a NaN return."""
+    config = _grid_config()
+    close_prices, fillable, slippage = _fit_inputs(config, processed_data)
+
+    # Sweep columns follow the grid: (5, -1), (5, -2), (10, -1), (10, -2).
+    trades = np.zeros(4, dtype=vbt.portfolio.enums.trade_dt)
+    trades["col"] = [1, 2, 2, 3]
+    trades["return"] = [0.02, 0.05, np.nan, np.nan]
+    trades["status"] = [1, 1, 0, 0]
+    portfolio = SimpleNamespace(trades=SimpleNamespace(records_arr=trades))
+    with patch("src.backtest._simulate", return_value=portfolio):
+        columns = _fit_params(config, processed_data, close_prices, fillable, slippage, Console())
+
+    # (10, -1) wins on its closed trade alone; its open NaN trade neither
+    # counts towards the hit rate nor makes the median NaN.
+    assert list(columns) == [(10, -1.0, "TEST.NS")]
+
+    # With only open trades, no set is eligible and the first grid point is used.
+    trades["status"] = 0
+    with patch("src.backtest._simulate", return_value=portfolio):
+        columns = _fit_params(config, processed_data, close_prices, fillable, slippage, Console())
+    assert list(columns) == [(5, -1.0, "TEST.NS")]
+
+
+def test_trade_scores_per_column():
+    """Tests that trade medians and hit rates are grouped by column, in any record order."""
+    cols = np.array([2, 0, 2, 0, 2, 0])
+    returns = np.array([0.03, -0.01, -0.02, 0.05, 0.01, 0.02])
+
+    medians, hit_rates = _trade_scores(cols, returns, 3)
+
+    np.testing.assert_allclose(medians, [0.02, np.nan, 0.01])
+    np.testing.assert_allclose(hit_rates, [2 / 3, np.nan, 2 / 3])
+
+
+def test_execution_costs_guard_uses_last_traded_close():
+    """Tests that fills need the open within the guard of the symbol's last traded close."""
+    dates = pd.date_range(start="2023-01-02", periods=4, freq="D")
+    open_prices = pd.DataFrame({"A.NS": [100.0, 105.0, np.nan, 120.0]}, index=dates)
+    close_prices = pd.DataFrame({"A.NS": [100.0, 110.0, np.nan, 111.0]}, index=dates)
+
+    fillable, _ = _execution_costs(open_prices, close_prices, _execution_config())
+
+    # Bar 0 has no previous close, bar 2 did not trade, and bar 3 opens
+    # within 10% of bar 1's close.
+    assert list(fillable["A.NS"]) == [False, True, False, True]
+
+
+def test_execution_costs_slippage_buckets_by_gap():
+    """Tests that slippage follows the |gap| buckets, with 2% and 5% opening the next bucket."""
+    dates = pd.date_range(start="2023-01-02", periods=6, freq="D")
+    open_prices = pd.DataFrame({"A.NS": [100.0, 100.0, 98.01, 102.0, 95.1, 105.0]}, index=dates)
+    close_prices = pd.DataFrame({"A.NS": [100.0] * 6}, index=dates)
+
+    _, slippage = _execution_costs(open_prices, close_prices, _execution_config())
+
+    np.testing.assert_allclose(slippage["A.NS"].iloc[1:], [0.0005, 0.0005, 0.001, 0.001, 0.002])
+
+
+def test_apply_circuit_guard_drops_unfillable_entries():
+    """Tests that entries on bars failing the guard are dropped per symbol and counted."""
+    dates = pd.date_range(start="2023-01-02", periods=4, freq="D")
+    fillable = pd.DataFrame(
+        {"A.NS": [True, False, True, True], "B.NS": [True, True, False, True]}, index=dates
+    )
+    columns = pd.MultiIndex.from_tuples(
+        [(5, -1.0, "A.NS"), (10, -1.0, "A.NS"), (5, -1.0, "B.NS")], names=["window", "k_low", "symbol"]
+    )
+    entries = pd.DataFrame(
+        [[True, False, True], [True, True, True], [False, True, True], [True, False, False]],
+        index=dates, columns=columns,
+    )
+
+    guarded, unfilled = _apply_circuit_guard(entries, fillable)
+
+    assert unfilled == 3
+    assert guarded.columns.equals(columns)
+    assert guarded.to_numpy().tolist() == [
+        [True, False, True], [False, False, True], [False, True, False], [True, False, False],
+    ]
+
+
+def _execution_config() -> ExecutionConfig:
+    """Builds the execution section used by the execution-cost tests."""
+    return ExecutionConfig(
+        circuit_guard_pct=0.1,
+        fees_bps=10.0,
+        slippage_model=SlippageConfig(gap_2pct=5.0, gap_5pct=10.0, gap_high=20.0),
+    )
@@ -0,0 +1,135 @@
+"""
+Tests for the on-disk feature cache.
+"""
+import copy
+import os
+from pathlib import Path
+from datetime import date
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from rich.console import Console
+
+from src.cache import load_cached_features, save_cached_features
+from src.config import Config, _from_dict
+
+# A complete and valid dictionary for creating a Config object in tests.
+FULL_CONFIG_DICT = {
+    "run": {"name": "test_cache_run", "t0": date(2023, 1, 15), "seed": 42, "output_dir": ""},
+    "data": {
+        "start_date": date(2023, 1, 1), "end_date": date(2023, 1, 31),
+        "source": "yfinance_test", "interval": "1d", "snapshot_dir": "", "refresh": False,
+    },
+    "universe": {"include_symbols": ["A.NS", "B.NS"], "exclude_symbols": [], "size": 2, "min_turnover": 1.0, "min_price": 1.0, "lookback_years": 1},
+    "detector": {"name": "gap_z", "window_range": [5], "k_low_range": [-1.0], "max_hold": 5, "min_hit_rate": 0.0},
+    "walk_forward": {"is_years": 1, "oos_years": 1, "holdout_years": 1},
+    "execution": {"circuit_guard_pct": 0.1, "fees_bps": 10.0, "slippage_model": {"gap_2pct": 1, "gap_5pct": 2, "gap_high": 3}},
+    "portfolio": {"max_concurrent": 1, "position_size": 1.0, "equal_weight": True, "reentry_lockout": True},
+    "reporting": {"generate_plots": False, "output_formats": ["json"], "include_unfilled": True},
+}
+
+
+@pytest.fixture
+def test_config(tmp_path: Path) -> Config:
+    """Pytest fixture to create a valid Config dataclass object for testing."""
+    config_dict = copy.deepcopy(FULL_CONFIG_DICT)
+    config_dict["data"]["snapshot_dir"] = str(tmp_path)
+    config_dict["run"]["output_dir"] = str(tmp_path)
+    return _from_dict(Config, config_dict)
+
+
+@pytest.fixture
+def processed_data(test_config: Config) -> dict[str, pd.DataFrame]:
+    """Writes two snapshots and returns matching processed frames."""
+    snapshot_dir = test_config.data.snapshot_dir / f"{test_config.data.source}_{test_config.data.interval}"
+    snapshot_dir.mkdir()
+    data = {}
+    for symbol, periods in [("A.NS", 3), ("B.NS", 2)]:
+        dates = pd.date_range("2023-01-02", periods=periods, freq="D", tz="Asia/Kolkata", name="Date")
+        df = pd.DataFrame({"Open": 1.0, "Close": 2.0, "Volume": 10}, index=dates)
+        df.to_parquet(snapshot_dir / f"{symbol}.parquet")
+        data[symbol] = df.assign(gap_pct=0.5)
+    return data
+
+
+def test_cache_round_trip(test_config: Config, processed_data: dict[str, pd.DataFrame]) -> None:
+    """Tests that cached frames come back identical and in universe order."""
+    universe = ["A.NS", "B.NS"]
+    assert load_cached_features(universe, test_config) is None
+
+    save_cached_features(processed_data, universe, test_config, Console())
+    cached = load_cached_features(universe, test_config)
+
+    assert cached is not None
+    assert list(cached) == universe
+    for symbol, df in processed_data.items():
+        pd.testing.assert_frame_equal(cached[symbol], df, check_freq=False)
+
+
+def test_cache_invalidated_by_snapshot_change(test_config: Config, processed_data: dict[str, pd.DataFrame]) -> None:
+    """Tests that touching a snapshot file turns the cache into a miss."""
+    universe = ["A.NS", "B.NS"]
+    save_cached_features(processed_data, universe, test_config, Console())
+
+    snapshot = test_config.data.snapshot_dir / f"{test_config.data.source}_{test_config.data.interval}" / "A.NS.parquet"
+    st = snapshot.stat()
+    os.utime(snapshot, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    assert load_cached_features(universe, test_config) is None
+
+
+def test_cache_save_replaces_stale_keys(test_config: Config, processed_data: dict[str, pd.DataFrame]) -> None:
+    """Tests that saving a new key deletes the universe's stale cache file but keeps other universes'."""
+    save_cached_features({"A.NS": processed_data["A.NS"]}, ["A.NS"], test_config, Console())
+    save_cached_features(processed_data, ["A.NS", "B.NS"], test_config, Console())
+
+    snapshot = test_config.data.snapshot_dir / f"{test_config.data.source}_{test_config.data.interval}" / "B.NS.parquet"
+    st = snapshot.stat()
+    os.utime(snapshot, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    save_cached_features(processed_data, ["A.NS", "B.NS"], test_config, Console())
+
+    assert len(list((test_config.data.snapshot_dir / "cache").glob("*.feather"))) == 2
+    assert load_cached_features(["A.NS"], test_config) is not None
+    assert load_cached_features(["A.NS", "B.NS"], test_config) is not None
+
+
+def test_cache_keeps_symbols_with_empty_frames(test_config: Config, processed_data: dict[str, pd.DataFrame]) -> None:
+    """Tests that a symbol whose processed frame is empty is still returned from the cache."""
+    universe = ["A.NS", "B.NS"]
+    processed_data["B.NS"] = processed_data["B.NS"].iloc[:0]
+    save_cached_features(processed_data, universe, test_config, Console())
+
+    cached = load_cached_features(universe, test_config)
+
+    assert cached is not None
+    assert list(cached) == universe
+    assert cached["B.NS"].empty
+    assert list(cached["B.NS"].columns) == list(processed_data["B.NS"].columns)
+
+
+def test_cache_truncated_file_is_a_miss(test_config: Config, processed_data: dict[str, pd.DataFrame]) -> None:
+    """Tests that an unreadable cache file is a miss and is replaced by the next save."""
+    universe = ["A.NS", "B.NS"]
+    save_cached_features(processed_data, universe, test_config, Console())
+    (cache_path,) = (test_config.data.snapshot_dir / "cache").glob("*.feather")
+    cache_path.write_bytes(cache_path.read_bytes()[:16])
+
+    assert load_cached_features(universe, test_config) is None
+    save_cached_features(processed_data, universe, test_config, Console())
+    assert load_cached_features(universe, test_config) is not None
+
+
+def test_cache_save_failure_only_warns(test_config: Config, processed_data: dict[str, pd.DataFrame]) -> None:
+    """Tests that a failed cache write warns, leaves no file behind and does not raise."""
+    console = Console(record=True)
+    with patch("pandas.DataFrame.to_feather", side_effect=OSError("No space left on device")):
+        save_cached_features(processed_data, ["A.NS", "B.NS"], test_config, console)
+
+    assert "could not write the feature cache" in console.export_text()
+    assert not list((test_config.data.snapshot_dir / "cache").iterdir())
+
+
+def test_cache_miss_on_missing_snapshot(test_config: Config, processed_data: dict[str, pd.DataFrame]) -> None:
+    """Tests that a missing snapshot is a cache miss, not an error."""
+    assert load_cached_features(["A.NS", "MISSING.NS"], test_config) is None
@@ -61,23 +61,44 @@ def test_cli_run_command_runs(mocker, tmp_path: Path) -> None:
     """
     Tests that the `run` command correctly orchestrates the pipeline functions.
     """
-    mocker.patch("cli.select_universe", return_value=["RELIANCE.NS"])
-    mocker.patch("cli.load_snapshots", return_value={"RELIANCE.NS": MagicMock()})
-    mocker.patch("cli.add_features", return_value=MagicMock())
-    mocker.patch("cli.run_the_backtest", return_value=MagicMock())
-    mocker.patch("cli.generate_all_reports")
+    mocker.patch("src.data.select_universe", return_value=["RELIANCE.NS"])
+    mocker.patch("src.data.load_snapshots", return_value={"RELIANCE.NS": MagicMock()})
+    mocker.patch("src.features.add_features", return_value=MagicMock())
+    mocker.patch("src.cache.load_cached_features", return_value=None)
+    m_save = mocker.patch("src.cache.save_cached_features")
+    mocker.patch("src.backtest.run", return_value=MagicMock())
+    mocker.patch("src.reporting.generate_all_reports")
 
     config_path = create_temp_config(tmp_path)
     result = runner.invoke(app, ["run", "--config", str(config_path)])
 
     assert result.exit_code == 0, f"CLI exited with error: {result.output}"
     assert "Run command finished" in result.output
+    m_save.assert_called_once()
+
+
+def test_cli_run_command_uses_feature_cache(mocker, tmp_path: Path) -> None:
+    """Tests that a feature-cache hit skips snapshot loading and feature processing."""
+    mocker.patch("src.data.select_universe", return_value=["RELIANCE.NS"])
+    m_load = mocker.patch("src.data.load_snapshots")
+    m_features = mocker.patch("src.features.add_features")
+    mocker.patch("src.cache.load_cached_features", return_value={"RELIANCE.NS": MagicMock()})
+    mocker.patch("src.backtest.run", return_value=MagicMock())
+    mocker.patch("src.reporting.generate_all_reports")
+
+    config_path = create_temp_config(tmp_path)
+    result = runner.invoke(app, ["run", "--config", str(config_path)])
+
+    assert result.exit_code == 0, f"CLI exited with error: {result.output}"
+    assert "Loaded processed features from cache" in result.output
+    m_load.assert_not_called()
+    m_features.assert_not_called()
 
 
 def test_cli_refresh_command_existing_symbols(mocker, tmp_path: Path) -> None:
     """Tests refresh-data when symbols are discovered in the snapshot dir."""
-    m_fetch = mocker.patch("cli.fetch_and_snapshot", return_value=[])
-    m_discover = mocker.patch("cli.discover_symbols", return_value=["EXISTING.NS"])
+    m_fetch = mocker.patch("src.data.fetch_and_snapshot", return_value=[])
+    m_discover = mocker.patch("src.data.discover_symbols", return_value=["EXISTING.NS"])
     config_path = create_temp_config(tmp_path)
 
     result = runner.invoke(app, ["refresh-data", "--config", str(config_path)])
@@ -90,8 +111,8 @@ def test_cli_refresh_command_existing_symbols(mocker, tmp_path: Path) -> None:
 
 def test_cli_refresh_command_bootstrap_from_config(mocker, tmp_path: Path) -> None:
     """Tests refresh-data when no snapshots exist and it uses the config list."""
-    m_fetch = mocker.patch("cli.fetch_and_snapshot", return_value=[])
-    m_discover = mocker.patch("cli.discover_symbols", return_value=[])
+    m_fetch = mocker.patch("src.data.fetch_and_snapshot", return_value=[])
+    m_discover = mocker.patch("src.data.discover_symbols", return_value=[])
     config_path = create_temp_config(tmp_path)
 
     result = runner.invoke(app, ["refresh-data", "--config", str(config_path)])
@@ -2,12 +2,14 @@
 Tests for configuration loading and validation.
 """
 import copy
+import os
 from pathlib import Path
 from datetime import date
 
 import pytest
 import yaml
 
+import src.config as config_module
 from src.config import Config, load_config, _from_dict, RunConfig
 
 # A complete and valid dictionary that can be used to construct a Config object.
@@ -92,6 +94,32 @@ def test_t0_validation_fails(tmp_path: Path) -> None:
         load_config(config_path)
 
 
+def test_max_hold_validation_fails(tmp_path: Path) -> None:
+    """Tests that a holding period below one bar is rejected."""
+    invalid_config = copy.deepcopy(FULL_CONFIG_DICT)
+    invalid_config["detector"]["max_hold"] = 0
+    config_path = tmp_path / "invalid.yaml"
+    with open(config_path, "w", encoding="utf-8") as f:
+        yaml.dump(invalid_config, f)
+
+    with pytest.raises(ValueError, match="detector.max_hold must be at least 1 bar"):
+        load_config(config_path)
+
+
+def test_load_config_accepts_unquoted_dates(tmp_path: Path) -> None:
+    """Tests that dates YAML already parsed into date objects are accepted as-is."""
+    config_dict = copy.deepcopy(FULL_CONFIG_DICT)
+    config_dict["run"]["t0"] = date(2023, 1, 15)
+    config_dict["data"]["start_date"] = date(2023, 1, 1)
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.dump(config_dict))
+    assert "t0: 2023-01-15" in config_path.read_text()
+
+    config = load_config(config_path)
+    assert config.run.t0 == date(2023, 1, 15)
+    assert config.data.end_date == date(2023, 12, 31)
+
+
 def test_from_dict_conversion():
     """Tests the internal _from_dict helper for creating nested dataclasses."""
     config_dict = copy.deepcopy(FULL_CONFIG_DICT)
@@ -105,3 +133,45 @@ def test_from_dict_conversion():
     assert isinstance(config.run, RunConfig)
     assert config.run.t0 == date(2023, 1, 15)
     assert config.execution.slippage_model.gap_2pct == 1
+
+
+def test_from_dict_rejects_unknown_and_missing_keys():
+    """Tests that _from_dict fails on unexpected or missing keys rather than ignoring them."""
+    config_dict = copy.deepcopy(FULL_CONFIG_DICT)
+    config_dict["run"]["typo_seed"] = 1
+    with pytest.raises(TypeError, match="unexpected keys: typo_seed"):
+        _from_dict(Config, config_dict)
+
+    config_dict = copy.deepcopy(FULL_CONFIG_DICT)
+    del config_dict["run"]["seed"]
+    with pytest.raises(KeyError):
+        _from_dict(Config, config_dict)
+
+    config_dict = copy.deepcopy(FULL_CONFIG_DICT)
+    config_dict["run"] = "test_run"
+    with pytest.raises(TypeError, match="RunConfig must be a mapping"):
+        _from_dict(Config, config_dict)
+
+
+def test_load_config_is_cached_until_file_changes(mocker, temp_config_file: Path) -> None:
+    """Tests that an unchanged config file is parsed once, and re-parsed after an edit."""
+    m_validate = mocker.patch("src.config._validate_config", side_effect=config_module._validate_config)
+
+    first = load_config(temp_config_file)
+    assert load_config(temp_config_file) is first
+    assert m_validate.call_count == 1
+
+    st = temp_config_file.stat()
+    os.utime(temp_config_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert load_config(temp_config_file) == first
+    assert m_validate.call_count == 2
+
+
+def test_load_config_sequences_are_immutable(temp_config_file: Path) -> None:
+    """Tests that list settings load as tuples, so the cached config cannot be mutated by callers."""
+    config = load_config(temp_config_file)
+    assert config.universe.include_symbols == ("TEST.NS",)
+    assert config.universe.exclude_symbols == ()
+    assert isinstance(config.detector.window_range, tuple)
+    assert isinstance(config.detector.k_low_range, tuple)
+    assert config.reporting.output_formats == ("json",)
@@ -41,36 +41,171 @@ def test_config(tmp_path: Path) -> Config:
     return _from_dict(Config, config_dict)
 
 
+def _ohlcv() -> pd.DataFrame:
+    return pd.DataFrame({"Open": [99.0], "High": [101.0], "Low": [98.0], "Close": [100.0], "Volume": [1000.0]})
+
+
+@patch("src.data.yf.Ticker")
 @patch("src.data.yf.download")
-def test_fetch_and_snapshot_success(mock_download: Mock, test_config: Config) -> None:
-    """Test that successful data fetching saves a snapshot."""
-    mock_data = pd.DataFrame({"Open": [99.0], "High": [101.0], "Low": [98.0], "Close": [100.0], "Volume": [1000.0]})
-    mock_download.return_value = mock_data
+def test_fetch_and_snapshot_success(mock_download: Mock, mock_ticker: Mock, test_config: Config) -> None:
+    """Test that a batched download is split into per-symbol snapshots."""
+    mock_download.return_value = pd.concat({"TEST.NS": _ohlcv()}, axis=1)
 
     failed = fetch_and_snapshot(["TEST.NS"], test_config)
     assert not failed
+    mock_ticker.assert_not_called()
     snapshot_dir = Path(test_config.data.snapshot_dir)
     expected_path = snapshot_dir / f"{test_config.data.source}_{test_config.data.interval}" / "TEST.NS.parquet"
     assert expected_path.exists()
+    written = pd.read_parquet(expected_path)
+    assert list(written.columns) == ["Open", "High", "Low", "Close", "Volume"]
+    assert written["Close"].dtype == "float32"
+    assert written["Volume"].dtype == "float64"
 
 
+@patch("src.data.yf.Ticker")
 @patch("src.data.yf.download")
-def test_fetch_and_snapshot_failure(mock_download: Mock, test_config: Config) -> None:
+def test_fetch_and_snapshot_failure(mock_download: Mock, mock_ticker: Mock, test_config: Config) -> None:
     """Test that yfinance failures are caught and returned."""
-    mock_download.side_effect = Exception("yfinance error")
+    mock_download.side_effect = ConnectionError("yfinance error")
+    mock_ticker.return_value.history.side_effect = ConnectionError("yfinance error")
     failed = fetch_and_snapshot(["FAIL.NS"], test_config)
     assert failed == ["FAIL.NS"]
 
 
+@patch("src.data.yf.Ticker")
+@patch("src.data.yf.download")
+def test_fetch_and_snapshot_isolates_symbol_errors(mock_download: Mock, mock_ticker: Mock, test_config: Config) -> None:
+    """Test that any error for one symbol marks it failed without stopping the others."""
+    mock_download.side_effect = ConnectionError("yfinance error")
+    mock_ticker.side_effect = lambda symbol: Mock(
+        history=Mock(side_effect=TypeError("bug")) if symbol == "FAIL.NS" else Mock(return_value=_ohlcv())
+    )
+    assert fetch_and_snapshot(["FAIL.NS", "OK.NS"], test_config) == ["FAIL.NS"]
+    snapshot_dir = Path(test_config.data.snapshot_dir) / f"{test_config.data.source}_{test_config.data.interval}"
+    assert (snapshot_dir / "OK.NS.parquet").exists()
+
+
+@patch("src.data.yf.Ticker")
+@patch("src.data.yf.download")
+def test_fetch_and_snapshot_propagates_batch_bugs(mock_download: Mock, mock_ticker: Mock, test_config: Config) -> None:
+    """Test that unexpected errors outside the per-symbol loop are not reported as failed downloads."""
+    mock_download.side_effect = TypeError("bug")
+    with pytest.raises(TypeError):
+        fetch_and_snapshot(["FAIL.NS"], test_config)
+
+
+@patch("src.data.yf.Ticker")
+@patch("src.data.yf.download")
+def test_fetch_and_snapshot_retries_missing(mock_download: Mock, mock_ticker: Mock, test_config: Config) -> None:
+    """Test that symbols missing from the batch are retried one by one, keeping order."""
+    mock_download.return_value = pd.concat({"OK.NS": _ohlcv()}, axis=1)
+    mock_ticker.side_effect = lambda symbol: Mock(
+        history=Mock(return_value=pd.DataFrame() if symbol.startswith("FAIL") else _ohlcv())
+    )
+    failed = fetch_and_snapshot(["FAIL_A.NS", "OK.NS", "RETRY.NS", "FAIL_B.NS"], test_config)
+    assert failed == ["FAIL_A.NS", "FAIL_B.NS"]
+    retried = [c.args[0] for c in mock_ticker.call_args_list]
+    assert sorted(retried) == ["FAIL_A.NS", "FAIL_B.NS", "RETRY.NS"]
+
+
+@patch("src.data.yf.Ticker")
+@patch("src.data.yf.download")
+def test_fetch_and_snapshot_incremental(mock_download: Mock, mock_ticker: Mock, test_config: Config) -> None:
+    """Test that a refresh only requests bars from the snapshot's last date and appends the new ones."""
+    first = _ohlcv().set_index(pd.DatetimeIndex(["2023-01-10"], name="Date"))
+    mock_download.return_value = pd.concat({"TEST.NS": first}, axis=1)
+    assert not fetch_and_snapshot(["TEST.NS"], test_config)
+
+    second = pd.concat([_ohlcv(), _ohlcv()]).set_index(pd.DatetimeIndex(["2023-01-10", "2023-01-11"], name="Date"))
+    mock_download.return_value = pd.concat({"TEST.NS": second}, axis=1)
+    assert not fetch_and_snapshot(["TEST.NS"], test_config)
+
+    assert mock_download.call_args.kwargs["start"] == date(2023, 1, 10)
+    snapshot_path = Path(test_config.data.snapshot_dir) / f"{test_config.data.source}_{test_config.data.interval}" / "TEST.NS.parquet"
+    assert list(pd.read_parquet(snapshot_path).index) == list(pd.to_datetime(["2023-01-10", "2023-01-11"]))
+    mock_ticker.assert_not_called()
+
+
+@patch("src.data.yf.Ticker")
+@patch("src.data.yf.download")
+def test_fetch_and_snapshot_redownloads_readjusted(mock_download: Mock, mock_ticker: Mock, test_config: Config) -> None:
+    """Test that a refresh whose overlapping bar was re-adjusted downloads the full history again."""
+    first = _ohlcv().set_index(pd.DatetimeIndex(["2023-01-10"], name="Date"))
+    mock_download.return_value = pd.concat({"TEST.NS": first}, axis=1)
+    assert not fetch_and_snapshot(["TEST.NS"], test_config)
+
+    # A 2:1 split halves every adjusted price, including the stored bar's.
+    split = pd.concat([_ohlcv(), _ohlcv()]).set_index(pd.DatetimeIndex(["2023-01-10", "2023-01-11"], name="Date")) / 2
+    mock_download.return_value = pd.concat({"TEST.NS": split}, axis=1)
+    mock_ticker.return_value.history.return_value = split
+    assert not fetch_and_snapshot(["TEST.NS"], test_config)
+
+    assert mock_ticker.return_value.history.call_args.kwargs["start"] == test_config.data.start_date
+    snapshot_path = Path(test_config.data.snapshot_dir) / f"{test_config.data.source}_{test_config.data.interval}" / "TEST.NS.parquet"
+    assert list(pd.read_parquet(snapshot_path)["Close"]) == [50.0, 50.0]
+
+
+@patch("src.data.yf.Ticker")
+@patch("src.data.yf.download")
+def test_fetch_and_snapshot_replaces_corrupt_snapshot(mock_download: Mock, mock_ticker: Mock, test_config: Config) -> None:
+    """Test that a corrupt existing snapshot is downloaded again in full instead of aborting the refresh."""
+    snapshot_dir = Path(test_config.data.snapshot_dir) / f"{test_config.data.source}_{test_config.data.interval}"
+    snapshot_dir.mkdir(parents=True)
+    (snapshot_dir / "BAD.NS.parquet").write_bytes(b"PAR1garbage")
+    mock_download.return_value = pd.concat({"BAD.NS": _ohlcv(), "OK.NS": _ohlcv()}, axis=1)
+
+    assert not fetch_and_snapshot(["BAD.NS", "OK.NS"], test_config)
+
+    assert mock_download.call_args.kwargs["start"] == test_config.data.start_date
+    assert list(pd.read_parquet(snapshot_dir / "BAD.NS.parquet")["Close"]) == [100.0]
+    assert sorted(p.name for p in snapshot_dir.iterdir()) == ["BAD.NS.parquet", "OK.NS.parquet"]
+
+
+@patch("src.data.yf.Ticker")
+@patch("src.data.yf.download")
+def test_fetch_and_snapshot_skips_current(mock_download: Mock, mock_ticker: Mock, test_config: Config) -> None:
+    """Test that a snapshot already ending at end_date is not downloaded again."""
+    last_day = _ohlcv().set_index(pd.DatetimeIndex(["2023-01-30"], name="Date"))
+    mock_download.return_value = pd.concat({"TEST.NS": last_day}, axis=1)
+    assert not fetch_and_snapshot(["TEST.NS"], test_config)
+    mock_download.reset_mock()
+
+    assert not fetch_and_snapshot(["TEST.NS"], test_config)
+    mock_download.assert_not_called()
+    mock_ticker.assert_not_called()
+
+
 def test_load_snapshots_success(test_config: Config) -> None:
     """Test that a snapshot can be loaded successfully."""
     snapshot_dir = Path(test_config.data.snapshot_dir)
     snapshot_subdir = snapshot_dir / f"{test_config.data.source}_{test_config.data.interval}"
     snapshot_subdir.mkdir()
     fake_snapshot_path = snapshot_subdir / "TEST.NS.parquet"
-    pd.DataFrame({"Open": [99], "High": [101], "Low": [98], "Close": [100.0], "Volume": [1000.0]}).to_parquet(fake_snapshot_path)
+    snapshot = _ohlcv().assign(Extra=1.0).set_axis(pd.DatetimeIndex(["2023-01-02"], name="Date"))
+    snapshot.to_parquet(fake_snapshot_path)
     data = load_snapshots(["TEST.NS"], test_config, Console())
     assert "TEST.NS" in data
+    # The date index survives the column projection; extra columns do not.
+    pd.testing.assert_frame_equal(data["TEST.NS"], snapshot.drop(columns="Extra"), check_freq=False)
+
+
+def test_load_snapshots_missing_columns_raises_error(test_config: Config) -> None:
+    """Test that a snapshot without the OHLCV columns is rejected."""
+    snapshot_subdir = Path(test_config.data.snapshot_dir) / f"{test_config.data.source}_{test_config.data.interval}"
+    snapshot_subdir.mkdir()
+    pd.DataFrame({"Close": [100.0]}).to_parquet(snapshot_subdir / "TEST.NS.parquet")
+    with pytest.raises(ValueError, match="missing required columns"):
+        load_snapshots(["TEST.NS"], test_config, Console())
+
+
+def test_load_snapshots_missing_symbols_raises_error(test_config: Config) -> None:
+    """Test that every missing snapshot is named in a single error."""
+    snapshot_subdir = Path(test_config.data.snapshot_dir) / f"{test_config.data.source}_{test_config.data.interval}"
+    snapshot_subdir.mkdir()
+    _ohlcv().to_parquet(snapshot_subdir / "TEST.NS.parquet")
+    with pytest.raises(FileNotFoundError, match="MISSING_A.NS, MISSING_B.NS"):
+        load_snapshots(["MISSING_A.NS", "TEST.NS", "MISSING_B.NS"], test_config, Console())
 
 
 def test_load_snapshots_missing_dir_raises_error(test_config: Config) -> None:
@@ -5,7 +5,7 @@ import pandas as pd
 import numpy as np
 import pytest
 
-from src.detectors import generate_signals
+from src.detectors import generate_signals, rolling_zscores, zscore_signal_rows, zscore_signals
 
 @pytest.fixture
 def sample_gap_data() -> pd.DataFrame:
@@ -57,3 +57,54 @@ def test_generate_signals_bad_input():
     with pytest.raises(ValueError, match="k_low threshold must be a negative value"):
         df = pd.DataFrame({"gap_pct": [0.01, -0.01]})
         generate_signals(df, window=1, k_low=2.0)
+
+
+def test_zscore_signals_match_pandas_rolling():
+    """
+    Tests that the kernel matches a pandas rolling z-score, per column,
+    including NaN gaps, a flat stretch and per-column parameters.
+    """
+    rng = np.random.default_rng(0)
+    gaps = rng.normal(0, 0.01, size=(120, 3))
+    gaps[0] = np.nan
+    gaps[40:45, 1] = np.nan
+    gaps[60:80, 2] = 0.0
+    windows = np.array([5, 10, 20])
+    k_lows = np.array([-0.5, -1.0, -1.5])
+
+    signals = zscore_signals(rolling_zscores(gaps, windows), k_lows)
+
+    for j, (window, k_low) in enumerate(zip(windows, k_lows)):
+        series = pd.Series(gaps[:, j])
+        rolling = series.rolling(window=window, min_periods=window // 2)
+        z_scores = (series - rolling.mean()) / rolling.std().replace(0, np.nan)
+        np.testing.assert_array_equal(signals[:, j], (z_scores < k_low).to_numpy())
+
+
+def test_rolling_zscores_float32_gaps_match_float64():
+    """Tests that float32 gaps give the same z-scores as their float64 upcast."""
+    gaps = np.random.default_rng(0).normal(0.0, 0.02, size=(200, 2)).astype(np.float32)
+    gaps[10:20, 1] = np.nan
+
+    z32 = rolling_zscores(gaps, np.array([5, 20]))
+    z64 = rolling_zscores(gaps.astype(np.float64), np.array([5, 20]))
+
+    assert z32.dtype == np.float64
+    np.testing.assert_array_equal(z32, z64)
+
+
+def test_zscore_signal_rows_match_signal_mask():
+    """Tests that signal rows from the sorted z-scores are exactly the rows of the boolean mask."""
+    gaps = np.random.default_rng(1).normal(0.0, 0.02, size=(300, 2))
+    gaps[50:60, 0] = np.nan
+    z_scores = rolling_zscores(gaps, np.array([10, 30]))
+    series_of_column = np.array([0, 0, 1])
+    k_lows = np.array([-1.0, -2.0, -1.5])
+
+    rows = zscore_signal_rows(z_scores, series_of_column, k_lows)
+    mask = zscore_signals(z_scores[:, series_of_column], k_lows)
+
+    for j in range(len(k_lows)):
+        np.testing.assert_array_equal(np.sort(rows[j]), np.flatnonzero(mask[:, j]))
+    with pytest.raises(ValueError):
+        zscore_signal_rows(z_scores, series_of_column, np.array([-1.0, 0.5, -1.0]))
@@ -14,7 +14,7 @@ from rich.console import Console
 
 from src.config import Config, _from_dict
 from src.backtest import run as run_backtest
-from src.reporting import generate_all_reports
+from src.reporting import _to_json_serializable, generate_all_reports
 
 # A complete and valid dictionary for creating a Config object in tests.
 FULL_CONFIG_DICT = {
@@ -86,7 +86,45 @@ def test_generate_all_reports(test_config: Config, sample_portfolio: vbt.Portfol
         summary_data = json.load(f)
 
     assert summary_data["run_name"] == "test_reporting_run"
+    # Detector parameters are fitted, and reported, per symbol.
+    assert summary_data["detector_params"] == {"TEST.NS": {"window": 5, "k_low": -1.0}}
     assert "Total Return [%]" in summary_data["metrics"]
     # Check that the metric exists, but don't assert its value, as no
     # trades may be generated in the synthetic test.
     assert "Total Trades" in summary_data["metrics"]
+
+
+def test_trade_ledger_csv_matches_trade_records(test_config: Config, sample_portfolio: vbt.Portfolio, tmp_path: Path):
+    """Tests that the trade ledger reads back as the portfolio's trade records."""
+    generate_all_reports(test_config, sample_portfolio, tmp_path, Console())
+
+    expected = sample_portfolio.trades.records
+    assert len(expected) > 0
+    with (tmp_path / "trade_ledger.csv").open("r") as f:
+        assert f.readline() == ",".join(expected.columns) + "\n"
+    ledger = pd.read_csv(tmp_path / "trade_ledger.csv")
+    pd.testing.assert_frame_equal(ledger, expected, check_dtype=False)
+
+
+def test_to_json_serializable_converts_stats_values():
+    """Tests that table-dispatched and fallback types both become plain JSON values."""
+    data = {
+        "nested": [np.int64(2), np.int8(3), np.float32(0.5), np.float16(np.nan), np.bool_(True)],
+        "start": pd.Timestamp("2023-01-15"),
+        "duration": pd.Timedelta(days=5),
+        "missing": pd.NaT,
+        "nan": float("nan"),
+        "path": Path("runs/out"),
+    }
+
+    result = _to_json_serializable(data)
+
+    assert result == {
+        "nested": [2, 3, 0.5, None, True],
+        "start": "2023-01-15 00:00:00",
+        "duration": "5 days 00:00:00",
+        "missing": None,
+        "nan": None,
+        "path": "runs/out",
+    }
+    json.dumps(result)